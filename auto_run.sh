@@ -91,12 +91,22 @@ while [ $RETRY_COUNT -lt $MAX_RETRIES ]; do
     log "✅ p2pd 进程已终止"
   fi
 
+  rm -f logs/ready.json
+
   # ✅ 在后台启动主脚本并自动输入空值
   WANDB_MODE=disabled ./run_rl_swarm.sh &
   RL_PID=$!
 
-  # ✅ 循环检测 Python 子进程初始化
-  sleep 600
+  # ✅ 等待 Python 子进程写出就绪文件（最多 600 秒）
+  READY_FILE="logs/ready.json"
+  READY_WAITED=0
+  while [ ! -f "$READY_FILE" ] && [ $READY_WAITED -lt 600 ] && kill -0 "$RL_PID" >/dev/null 2>&1; do
+    sleep 5
+    READY_WAITED=$((READY_WAITED + 5))
+  done
+  if [ -f "$READY_FILE" ]; then
+    log "✅ 节点已就绪，用时 ${READY_WAITED} 秒"
+  fi
   PY_PID=$(pgrep -P $RL_PID -f python | head -n 1)
 
   if [ -z "$PY_PID" ]; then
@@ -0,0 +1,91 @@
+"""Size and speed of the compact DHT outputs codec against plain dicts.
+
+Plain outputs are measured as hivemind would serialize them: msgpack of the
+question-hash (hex) dict, followed by ``hash_keys`` on read.
+
+    python benchmarks/bench_dht_codec.py --questions 64 --completions 8
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from hivemind_exp import dht_utils  # noqa: E402
+from hivemind_exp.dht_utils import decode_outputs, encode_outputs, hash_keys  # noqa: E402
+
+
+def make_outputs(questions: int, completions: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+
+    def text(n):
+        return "".join(rng.choice(string.ascii_letters + " ") for _ in range(n))
+
+    return {
+        f"Question {i}: {text(200)}": (
+            time.time(),
+            {
+                "question": text(200),
+                "answer": text(8),
+                "outputs": [
+                    f"<think>{text(300)}</think><answer>{text(8)}</answer>"
+                    for _ in range(completions)
+                ],
+                "rewards": [rng.random() for _ in range(completions)],
+            },
+        )
+        for i in range(questions)
+    }
+
+
+def timeit(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=64)
+    parser.add_argument("--completions", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    outputs = make_outputs(args.questions, args.completions)
+    plain = dht_utils._packb(hash_keys(outputs))
+    rows = [
+        (
+            "plain",
+            len(plain),
+            timeit(lambda: dht_utils._packb(hash_keys(outputs)), args.repeat),
+            timeit(lambda: hash_keys(dht_utils._unpackb(plain)), args.repeat),
+        )
+    ]
+    for name, compress in (("compact", False), ("compact+zstd", True)):
+        blob = encode_outputs(outputs, compress=compress)
+        if compress and not blob[len(dht_utils.COMPACT_MAGIC) + 1]:
+            name += " (zstandard missing)"
+        rows.append(
+            (
+                name,
+                len(blob),
+                timeit(lambda: encode_outputs(outputs, compress=compress), args.repeat),
+                timeit(lambda: decode_outputs(blob), args.repeat),
+            )
+        )
+
+    print(f"{'format':<28}{'bytes':>10}{'ratio':>8}{'encode ms':>12}{'decode ms':>12}")
+    for name, size, encode_ms, decode_ms in rows:
+        print(
+            f"{name:<28}{size:>10}{size / len(plain):>8.2f}"
+            f"{encode_ms:>12.3f}{decode_ms:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
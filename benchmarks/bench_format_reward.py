@@ -0,0 +1,68 @@
+"""format_reward's tag scanner against the regex it replaced.
+
+    python benchmarks/bench_format_reward.py --tokens 512 2048 8192
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rgym_exp.src.utils.reward_utils import is_well_formatted  # noqa: E402
+
+REGEX = r"^<think>([^<]*(?:<(?!/?think>)[^<]*)*)<\/think>\n<answer>([\s\S]*?)<\/answer>$"
+
+
+def regex_match(completion: str) -> bool:
+    # As format_reward did: compiled through re's module cache on every call.
+    return re.match(REGEX, completion, flags=re.DOTALL) is not None
+
+
+def completions(n_chars: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    words = ["the", "x", "<", "=", "so", "answer", "3", "a<b", "think"]
+    text = " ".join(rng.choice(words) for _ in range(n_chars // 3))[:n_chars]
+    return {
+        "well formed": f"<think>{text}</think>\n<answer>42</answer>",
+        "unclosed think": f"<think>{text}",
+        "many '<'": "<think>" + "<" * n_chars,
+        "'<t' soup": "<think>" + "<t" * (n_chars // 2) + "</think>\n<answer>",
+    }
+
+
+def timeit(fn, value: str, budget: float) -> float:
+    """Mean seconds per call, repeating until ``budget`` seconds have passed."""
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn(value)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    # Roughly four characters per token.
+    parser.add_argument("--tokens", type=int, nargs="+", default=[512, 2048, 8192])
+    parser.add_argument("--budget", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'case':<16}{'tokens':>8}{'regex us':>12}{'scanner us':>12}{'speedup':>10}")
+    for tokens in args.tokens:
+        for name, completion in completions(tokens * 4).items():
+            assert regex_match(completion) == is_well_formatted(completion), name
+            regex_s = timeit(regex_match, completion, args.budget)
+            scanner_s = timeit(is_well_formatted, completion, args.budget)
+            print(
+                f"{name:<16}{tokens:>8}{regex_s * 1e6:>12.1f}"
+                f"{scanner_s * 1e6:>12.2f}{regex_s / scanner_s:>9.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Prompt prefill reuse (kv_prefix) against per-generation generate calls.
+
+Uses a randomly initialised Llama-style model on CPU. Prompts share a long
+system-prompt prefix followed by a per-question suffix, as in a swarm round.
+The baseline mirrors GRPOTrainerModule._generate_per_generation: one generate
+call per generation over left-padded prompts. Greedy outputs of both paths
+are checked to be identical before timing.
+
+    python benchmarks/bench_kv_prefix.py --questions 8 --generations 4
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rgym_exp.src.utils.kv_prefix import SharedPrefixBatch, prefill  # noqa: E402
+
+PAD = 0
+
+
+def make_prompts(questions: int, prefix_len: int, suffix_len: int, vocab: int):
+    rng = random.Random(0)
+    prefix = [rng.randrange(2, vocab) for _ in range(prefix_len)]
+    prompts = []
+    for _ in range(questions):
+        length = rng.randint(suffix_len // 2, suffix_len)
+        prompts.append(prefix + [rng.randrange(2, vocab) for _ in range(length)])
+    return prompts
+
+
+def left_padded(sequences):
+    width = max(len(seq) for seq in sequences)
+    input_ids = torch.full((len(sequences), width), PAD, dtype=torch.long)
+    attention_mask = torch.zeros_like(input_ids)
+    for row, seq in enumerate(sequences):
+        input_ids[row, width - len(seq) :] = torch.tensor(seq)
+        attention_mask[row, width - len(seq) :] = 1
+    return input_ids, attention_mask
+
+
+@torch.no_grad()
+def per_generation(model, prompts, generations, generate_kwargs):
+    input_ids, attention_mask = left_padded(prompts)
+    outputs = [
+        model.generate(input_ids, attention_mask=attention_mask, **generate_kwargs)
+        for _ in range(generations)
+    ]
+    # Rows in repeat_interleave order, to compare with the shared path.
+    return torch.stack(outputs, dim=1).flatten(0, 1)[:, input_ids.size(1) :]
+
+
+@torch.no_grad()
+def shared_prefix(model, prompts, generations, generate_kwargs):
+    batch = SharedPrefixBatch.from_sequences(prompts, PAD)
+    cache = prefill(model, batch, generations)
+    outputs = model.generate(
+        batch.input_ids.repeat_interleave(generations, dim=0),
+        attention_mask=batch.attention_mask.repeat_interleave(generations, dim=0),
+        past_key_values=cache,
+        **generate_kwargs,
+    )
+    return outputs[:, batch.input_ids.size(1) :]
+
+
+def timeit(fn, repeat: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=8)
+    parser.add_argument("--generations", type=int, default=4)
+    parser.add_argument("--prefix-tokens", type=int, default=384)
+    parser.add_argument("--suffix-tokens", type=int, default=96)
+    parser.add_argument("--new-tokens", type=int, default=16)
+    parser.add_argument("--hidden-size", type=int, default=256)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=1024,
+        hidden_size=args.hidden_size,
+        intermediate_size=args.hidden_size * 3,
+        num_hidden_layers=args.layers,
+        num_attention_heads=8,
+        num_key_value_heads=4,
+        max_position_embeddings=(
+            args.prefix_tokens + args.suffix_tokens + args.new_tokens
+        ),
+        pad_token_id=PAD,
+    )
+    model = LlamaForCausalLM(config).eval()
+    prompts = make_prompts(
+        args.questions, args.prefix_tokens, args.suffix_tokens, config.vocab_size
+    )
+    generate_kwargs = dict(
+        do_sample=False,
+        max_new_tokens=args.new_tokens,
+        pad_token_id=PAD,
+        eos_token_id=None,
+    )
+
+    baseline = per_generation(model, prompts, args.generations, generate_kwargs)
+    reused = shared_prefix(model, prompts, args.generations, generate_kwargs)
+    assert torch.equal(baseline, reused), "shared-prefix outputs differ"
+
+    width = max(len(p) for p in prompts)
+    batch = SharedPrefixBatch.from_sequences(prompts, PAD)
+    baseline_prefill = args.generations * len(prompts) * width
+    reused_prefill = batch.prefix_length + len(prompts) * (
+        batch.input_ids.size(1) - batch.prefix_length
+    )
+    baseline_s = timeit(
+        lambda: per_generation(model, prompts, args.generations, generate_kwargs),
+        args.repeat,
+    )
+    reused_s = timeit(
+        lambda: shared_prefix(model, prompts, args.generations, generate_kwargs),
+        args.repeat,
+    )
+
+    print(
+        f"{args.questions} questions x {args.generations} generations, "
+        f"{batch.prefix_length}-token shared prefix, {args.new_tokens} new tokens"
+    )
+    print("outputs identical under greedy decoding")
+    print(f"{'path':<16}{'prefill tokens':>16}{'seconds':>10}")
+    print(f"{'per-generation':<16}{baseline_prefill:>16}{baseline_s:>10.3f}")
+    print(f"{'shared prefix':<16}{reused_prefill:>16}{reused_s:>10.3f}")
+    print(f"speedup {baseline_s / reused_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Runs swarm_launcher.main against stub backends to exercise startup profiling.
+
+Each stub sleeps for a configurable time in place of DHT bootstrap, chain
+calls, dataset setup and model loading, so the report shows how the phases
+overlap without network access or model weights. Needs genrl and hydra.
+
+    python benchmarks/bench_startup.py --model-load 2 --register 1 --data 1.5
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from omegaconf import OmegaConf  # noqa: E402
+
+from rgym_exp.runner import swarm_launcher  # noqa: E402
+from rgym_exp.src.utils.startup_profile import PROFILE_ENV_VAR  # noqa: E402
+
+STUB = __name__  # Module path of the stub _target_s below.
+
+
+class StubCommunication:
+    def __init__(self, delay: float):
+        time.sleep(delay)
+
+    def get_id(self):
+        return "stub-peer"
+
+
+class StubCoordinator:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def register_peer(self, peer_id):
+        time.sleep(self.delay)
+
+
+class StubDataManager:
+    def __init__(self, delay: float):
+        time.sleep(delay)
+
+
+class StubTrainer:
+    def __init__(self, delay: float):
+        time.sleep(delay)
+
+
+class StubGameManager:
+    def __init__(self, preregistered_peer_id, **components):
+        self.peer_id = preregistered_peer_id
+
+    def run_game(self):
+        pass
+
+
+def make_config(args, log_dir: str):
+    def stub(name, delay):
+        return {"_target_": f"{STUB}.{name}", "delay": delay}
+
+    return OmegaConf.create(
+        {
+            "log_dir": log_dir,
+            "game_manager": {
+                "_target_": f"{STUB}.StubGameManager",
+                "communication": stub("StubCommunication", args.dht),
+                "coordinator": stub("StubCoordinator", args.register),
+                "data_manager": stub("StubDataManager", args.data),
+                "trainer": stub("StubTrainer", args.model_load),
+            },
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dht", type=float, default=0.5)
+    parser.add_argument("--register", type=float, default=1.0)
+    parser.add_argument("--data", type=float, default=1.5)
+    parser.add_argument("--model-load", type=float, default=2.0)
+    args = parser.parse_args()
+
+    os.environ[PROFILE_ENV_VAR] = "1"
+    with tempfile.TemporaryDirectory() as log_dir:
+        start = time.monotonic()
+        swarm_launcher.main.__wrapped__(make_config(args, log_dir))
+        elapsed = time.monotonic() - start
+
+        serial = args.dht + args.register + args.data + args.model_load
+        print(f"startup {elapsed:.2f}s; the stub delays sum to {serial:.2f}s")
+        with open(os.path.join(log_dir, "startup_profile.json")) as f:
+            phases = json.load(f)["phases"]
+        for phase in phases:
+            if not phase["name"].startswith("import:"):
+                print(
+                    f"  {phase['start_s']:>7.2f}s  {phase['duration_s']:>6.2f}s  "
+                    f"{phase['thread']:<18}{'  ' * phase['depth']}{phase['name']}"
+                )
+        with open(os.path.join(log_dir, "startup_profile.folded")) as f:
+            print(f"{len(f.readlines())} collapsed stacks for flamegraph.pl")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import json
 import logging
+import threading
+import time
 from abc import ABC
 
 import requests
@@ -47,15 +49,89 @@ class SwarmCoordinator(ABC):
         return round_num, stage_num
 
 
+class NonceManager:
+    """Hands out account nonces locally so transactions can be sent back to back.
+
+    The nonce is fetched from the chain (including pending transactions) and
+    incremented locally. It is refetched after a failed send (resync()) and
+    whenever it is more than ``refresh_interval`` seconds old, so a
+    transaction that was accepted but later dropped from the mempool cannot
+    leave the local nonce permanently ahead of the chain.
+    """
+
+    def __init__(
+        self, web3: Web3, address: str, refresh_interval: float = 60.0
+    ) -> None:
+        self.web3 = web3
+        self.address = Web3.to_checksum_address(address)
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._next_nonce: int | None = None
+        self._synced_at = 0.0
+
+    def next_nonce(self) -> int:
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._next_nonce is None
+                or now - self._synced_at > self.refresh_interval
+            ):
+                chain_nonce = self.web3.eth.get_transaction_count(
+                    self.address, "pending"
+                )
+                if self._next_nonce is not None and chain_nonce != self._next_nonce:
+                    logger.info(
+                        f"Local nonce {self._next_nonce} drifted from chain nonce "
+                        f"{chain_nonce}; resyncing."
+                    )
+                self._next_nonce = chain_nonce
+                self._synced_at = now
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def resync(self):
+        with self._lock:
+            self._next_nonce = None
+
+
+class GasPriceCache:
+    """Caches the network gas price for ``ttl`` seconds, falling back to a fixed price."""
+
+    def __init__(self, web3: Web3, ttl: float = 60.0, fallback_gwei: str = "5") -> None:
+        self.web3 = web3
+        self.ttl = ttl
+        self.fallback = web3.to_wei(fallback_gwei, "gwei")
+        self._lock = threading.Lock()
+        self._price: int | None = None
+        self._fetched_at = 0.0
+
+    def get(self) -> int:
+        with self._lock:
+            if self._price is None or time.monotonic() - self._fetched_at > self.ttl:
+                try:
+                    self._price = self.web3.eth.gas_price
+                except Exception as e:
+                    logger.debug(f"Could not fetch gas price: {e}")
+                    self._price = self._price or self.fallback
+                self._fetched_at = time.monotonic()
+            return self._price
+
+
 class WalletSwarmCoordinator(SwarmCoordinator):
     def __init__(self, web3: Web3, contract_address: str, private_key: str) -> None:
         super().__init__(web3, contract_address)
         self.account = setup_account(self.web3, private_key)
+        # Transactions are sent without waiting for receipts; local nonces let
+        # submit_reward and submit_winners go out back to back.
+        self.nonce_manager = NonceManager(self.web3, self.account.address)
+        self.gas_price = GasPriceCache(self.web3)
 
     def _default_gas(self):
         return {
             "gas": 2000000,
-            "gasPrice": self.web3.to_wei("5", "gwei"),
+            "gasPrice": self.gas_price.get(),
+            "chainId": MAINNET_CHAIN_ID,
         }
 
     def register_peer(self, peer_id):
@@ -65,6 +141,7 @@ class WalletSwarmCoordinator(SwarmCoordinator):
             lambda: self.contract.functions.registerPeer(peer_id).build_transaction(
                 self._default_gas()
             ),
+            nonce_manager=self.nonce_manager,
         )
 
     def submit_winners(self, round_num, winners, peer_id):
@@ -74,6 +151,7 @@ class WalletSwarmCoordinator(SwarmCoordinator):
             lambda: self.contract.functions.submitWinners(
                 round_num, winners, peer_id
             ).build_transaction(self._default_gas()),
+            nonce_manager=self.nonce_manager,
         )
 
     def submit_reward(self, round_num, stage_num, reward, peer_id):
@@ -83,6 +161,7 @@ class WalletSwarmCoordinator(SwarmCoordinator):
             lambda: self.contract.functions.submitReward(
                 round_num, stage_num, reward, peer_id
             ).build_transaction(self._default_gas()),
+            nonce_manager=self.nonce_manager,
         )
 
 
@@ -177,18 +256,43 @@ def setup_account(web3: Web3, private_key) -> Account:
     return account
 
 
+def _is_nonce_error(error: Exception) -> bool:
+    return "nonce too low" in str(error).lower()
+
+
 def send_chain_txn(
-    web3: Web3, account: Account, txn_factory, chain_id=MAINNET_CHAIN_ID
+    web3: Web3,
+    account: Account,
+    txn_factory,
+    chain_id=MAINNET_CHAIN_ID,
+    nonce_manager: NonceManager | None = None,
 ):
     checksummed = Web3.to_checksum_address(account.address)
-    txn = txn_factory() | {
-        "chainId": chain_id,
-        "nonce": web3.eth.get_transaction_count(checksummed),
-    }
+    for attempt in range(2):
+        if nonce_manager is not None:
+            nonce = nonce_manager.next_nonce()
+        else:
+            nonce = web3.eth.get_transaction_count(checksummed)
+        txn = txn_factory() | {
+            "chainId": chain_id,
+            "nonce": nonce,
+        }
 
-    # Sign the transaction
-    signed_txn = web3.eth.account.sign_transaction(txn, private_key=account.key)
+        # Sign the transaction
+        signed_txn = web3.eth.account.sign_transaction(txn, private_key=account.key)
 
-    # Send the transaction
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    logger.info(f"Sent transaction with hash: {web3.to_hex(tx_hash)}")
+        # Send the transaction
+        try:
+            tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        except Exception as e:
+            if nonce_manager is None:
+                raise
+            # The local nonce may now be ahead of or behind the chain.
+            nonce_manager.resync()
+            if attempt == 0 and _is_nonce_error(e):
+                logger.info(f"Nonce {nonce} rejected, resyncing and retrying.")
+                continue
+            raise
+
+        logger.info(f"Sent transaction with hash: {web3.to_hex(tx_hash)}")
+        return tx_hash
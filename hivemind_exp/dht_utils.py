@@ -1,11 +1,18 @@
 import hashlib
-from functools import lru_cache
-from typing import Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator
 
 from hivemind.dht import DHT
-from hivemind.utils import ValueWithExpiration
+from hivemind.utils import ValueWithExpiration, get_dht_time
 
-from hivemind_exp.hivemind_utils import HivemindNode
+try:
+    import msgpack  # Installed with hivemind; without it only plain outputs are written.
+except ImportError:
+    msgpack = None
+
+from hivemind_exp.hivemind_utils import HivemindNode, estimate_nbytes
 
 ROUND_STAGE_NUMBER_KEY = "rl_swarm_rs"  # No subkeys. Coordinator publishes.
 
@@ -35,7 +42,173 @@ def node_outputs_key(node: HivemindNode) -> str:
     return outputs_key(node.key, node.round_num, node.stage_num)
 
 
+# Compact wire format for published outputs and rewards:
+#   COMPACT_MAGIC | version (1 byte) | flags (1 byte) | body
+# where body is a msgpack list of [16-byte md5 digest, value] pairs, optionally
+# zstd-compressed. Tuples are preserved with a msgpack extension type. Readers
+# accept both this format and the plain per-question subkeys published by
+# older nodes (see publish_outputs and publish_rewards).
+COMPACT_MAGIC = b"RLS\x00"
+COMPACT_VERSION = 1
+COMPACT_FLAG_ZSTD = 0x01
+_COMPACT_HEADER_LEN = len(COMPACT_MAGIC) + 2
+_MSGPACK_TUPLE_EXT = 1
+
+
+class HashedOutputs(dict):
+    """Outputs whose keys are already md5 hex digests (skipped by hash_keys)."""
+
+
+def _question_digest(key: str) -> bytes:
+    if len(key) == 32:  # Already hashed, see hash_keys.
+        try:
+            return bytes.fromhex(key)
+        except ValueError:
+            pass
+    return hashlib.md5(key.encode()).digest()
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, tuple):
+        return msgpack.ExtType(_MSGPACK_TUPLE_EXT, _packb(list(obj)))
+    raise TypeError(f"cannot encode {type(obj).__name__} in compact outputs")
+
+
+def _msgpack_ext_hook(code, data):
+    if code == _MSGPACK_TUPLE_EXT:
+        return tuple(_unpackb(data))
+    return msgpack.ExtType(code, data)
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImportError("compact outputs need msgpack")
+
+
+def _packb(value) -> bytes:
+    _require_msgpack()
+    return msgpack.packb(
+        value, default=_msgpack_default, strict_types=True, use_bin_type=True
+    )
+
+
+def _unpackb(data: bytes):
+    _require_msgpack()
+    return msgpack.unpackb(
+        data, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False
+    )
+
+
+def encode_outputs(outputs: dict[str, Any], compress: bool = False) -> bytes:
+    """Encode Q (or Q hash): value outputs in the compact wire format."""
+    body = _packb([[_question_digest(k), v] for k, v in outputs.items()])
+    flags = 0
+    if compress:
+        try:
+            import zstandard
+
+            body = zstandard.ZstdCompressor().compress(body)
+            flags |= COMPACT_FLAG_ZSTD
+        except ImportError:
+            pass  # Stored uncompressed; the flag tells readers.
+    return COMPACT_MAGIC + bytes([COMPACT_VERSION, flags]) + body
+
+
+def publish_outputs(
+    dht: DHT,
+    node: HivemindNode,
+    outputs: dict[str, tuple[float, dict]],
+    compact: bool = False,
+    compress: bool = False,
+) -> bool:
+    """Publish Q: (timestamp, outputs) for the node's current round and stage.
+
+    By default outputs are stored as one subkey per question hash, which every
+    release can read. With ``compact=True`` (and msgpack installed) they are
+    stored as one compact record under the node's key as subkey instead; only
+    enable it once all peers read the compact format. Readers merge both.
+    """
+    key = node_outputs_key(node)
+    expiration_time = get_dht_time() + node.out_expiration
+    if compact and msgpack is not None:
+        return bool(
+            dht.store(
+                key=key,
+                subkey=node.key,
+                value=encode_outputs(outputs, compress=compress),
+                expiration_time=expiration_time,
+            )
+        )
+
+    stored = True
+    for question, value in hash_keys(outputs).items():
+        stored &= bool(
+            dht.store(
+                key=key, subkey=question, value=value, expiration_time=expiration_time
+            )
+        )
+    return stored
+
+
+def publish_rewards(
+    dht: DHT,
+    node: HivemindNode,
+    rewards: Any,
+    compact: bool = False,
+    compress: bool = False,
+) -> bool:
+    """Publish the node's rewards for its current round and stage.
+
+    Rewards go under the node's key as subkey. A Q: reward dict may be sent in
+    the compact format with ``compact=True``, with the same caveat as
+    publish_outputs; anything else is stored as is.
+    """
+    if compact and msgpack is not None and isinstance(rewards, dict):
+        rewards = encode_outputs(rewards, compress=compress)
+    return bool(
+        dht.store(
+            key=rewards_key(node.round_num, node.stage_num),
+            subkey=node.key,
+            value=rewards,
+            expiration_time=get_dht_time() + node.out_expiration,
+        )
+    )
+
+
+def get_rewards(dht: DHT, r, s) -> dict[str, Any]:  # Node key: rewards
+    """Rewards every node published for a round and stage, decoded per node."""
+    wrapper = dht.get(rewards_key(r, s), latest=True)
+    if not wrapper or not isinstance(wrapper.value, dict):
+        return {}
+
+    rewards = {}
+    for node_key, value in wrapper.value.items():
+        value = value.value
+        rewards[node_key] = decode_outputs(value) if is_compact(value) else value
+    return rewards
+
+
+def is_compact(value: Any) -> bool:
+    return isinstance(value, bytes) and value.startswith(COMPACT_MAGIC)
+
+
+def decode_outputs(blob: bytes) -> HashedOutputs:
+    """Decode compact outputs into Q hash (hex): value."""
+    version, flags = blob[len(COMPACT_MAGIC)], blob[len(COMPACT_MAGIC) + 1]
+    if version != COMPACT_VERSION:
+        raise ValueError(f"unsupported compact outputs version {version}")
+    body = blob[_COMPACT_HEADER_LEN:]
+    if flags & COMPACT_FLAG_ZSTD:
+        import zstandard
+
+        body = zstandard.ZstdDecompressor().decompress(body)
+    return HashedOutputs((digest.hex(), value) for digest, value in _unpackb(body))
+
+
 def hash_keys(outputs):
+    if isinstance(outputs, HashedOutputs):
+        return outputs
+
     # Handles older versions of the trainer that did not hash question keys.
     result = {}
     for k, v in outputs.items():
@@ -46,24 +219,200 @@ def hash_keys(outputs):
     return result
 
 
-@lru_cache(maxsize=128)  # 增加缓存大小
+_MISSING = object()
+
+
+class OutputsCache:
+    """Bounded cache of stage outputs fetched from the DHT.
+
+    Entries are keyed by (node_key, round, stage) and expire after ``ttl``
+    seconds, matching how long nodes publish their outputs for. Failed
+    lookups are remembered for ``negative_ttl`` seconds. Entries from rounds
+    older than the newest round seen (minus ``keep_rounds - 1``) are evicted,
+    as are the least recently used entries once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = HivemindNode.out_expiration,
+        negative_ttl: float = 30.0,
+        keep_rounds: int = 1,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.keep_rounds = keep_rounds
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, nbytes, outputs or None for a negative entry)
+        self._entries: OrderedDict[tuple[str, int, int], tuple[float, int, Any]] = (
+            OrderedDict()
+        )
+        self._newest_round = -1
+        self.nbytes = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+        }
+
+    def _pop(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self.nbytes -= nbytes
+
+    def get(self, key: tuple[str, int, int]) -> Any:
+        """Return cached outputs, None for a cached miss, or _MISSING."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._pop(key)
+                self.misses += 1
+                return _MISSING
+
+            self._entries.move_to_end(key)
+            if entry[2] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry[2]
+
+    def _put(self, key: tuple[str, int, int], value: Any, ttl: float):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+            round_num = key[1]
+            if round_num > self._newest_round:
+                self._newest_round = round_num
+                self._evict_before(round_num - self.keep_rounds + 1)
+            elif round_num < self._newest_round - self.keep_rounds + 1:
+                return
+
+            nbytes = 0 if value is None else estimate_nbytes(value)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + ttl, nbytes, value)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def put(self, key: tuple[str, int, int], outputs: dict):
+        self._put(key, outputs, self.ttl)
+
+    def put_negative(self, key: tuple[str, int, int]):
+        self._put(key, None, self.negative_ttl)
+
+    def _evict_before(self, round_num: int):
+        for key in [key for key in self._entries if key[1] < round_num]:
+            self._pop(key)
+
+    def evict_before(self, round_num: int):
+        with self._lock:
+            self._evict_before(round_num)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+OUTPUTS_CACHE = OutputsCache()
+
+
 def get_outputs(
-    dht: DHT, node_key: str, r, s, get_cached_fn=None
+    dht: DHT,
+    node_key: str,
+    r,
+    s,
+    get_cached_fn=None,
+    cache: OutputsCache = OUTPUTS_CACHE,
+    deadline: float = 10.0,
 ) -> dict[str, tuple[float, dict]]:  # Q: (timestamp, outputs)
+    """Outputs of one node; use get_outputs_many to gather several at once."""
     # Try provided cache function first.
     if get_cached_fn:
         if outputs := get_cached_fn(r, s):
             return hash_keys(outputs)
 
     # Try from DHT next to include peered outputs.
-    if outputs := get_dht_value(dht, key=outputs_key(node_key, r, s), latest=False):
-        return hash_keys(outputs)
+    key = (node_key, r, s)
+    if outputs := get_outputs_many(dht, [key], deadline=deadline, cache=cache).get(key):
+        return outputs
 
     raise ValueError(
         f"could not retrieve stage outputs for {node_key} at round {r} stage {s}"
     )
 
 
+def iter_outputs(
+    dht: DHT,
+    keys: Iterable[tuple[str, int, int]],
+    deadline: float = 10.0,
+    cache: OutputsCache = OUTPUTS_CACHE,
+    poll_interval: float = 0.01,
+) -> Iterator[tuple[tuple[str, int, int], dict[str, tuple[float, dict]]]]:
+    """Yield ((node_key, round, stage), outputs) as concurrent lookups complete.
+
+    All uncached lookups are issued up front on the DHT's event loop. Lookups
+    still outstanding after ``deadline`` seconds are cancelled, so callers may
+    receive only a subset of ``keys``.
+    """
+    pending = {}
+    for key in dict.fromkeys(keys):
+        outputs = cache.get(key)
+        if outputs is _MISSING:
+            node_key, r, s = key
+            pending[key] = dht.get(
+                outputs_key(node_key, r, s), latest=False, return_future=True
+            )
+        elif outputs:
+            yield key, outputs
+
+    end_time = time.monotonic() + deadline
+    while pending:
+        for key in [key for key, future in pending.items() if future.done()]:
+            future = pending.pop(key)
+            try:
+                outputs = unwrap_dht_value(future.result())
+            except Exception:
+                outputs = None
+
+            if outputs:
+                outputs = hash_keys(outputs)
+                cache.put(key, outputs)
+                yield key, outputs
+            else:
+                cache.put_negative(key)
+
+        if not pending:
+            break
+        if time.monotonic() >= end_time:
+            for future in pending.values():
+                future.cancel()
+            break
+        time.sleep(poll_interval)
+
+
+def get_outputs_many(
+    dht: DHT,
+    keys: Iterable[tuple[str, int, int]],
+    deadline: float = 10.0,
+    cache: OutputsCache = OUTPUTS_CACHE,
+) -> dict[tuple[str, int, int], dict[str, tuple[float, dict]]]:
+    """Fetch outputs for many (node_key, round, stage) keys; may be partial."""
+    return dict(iter_outputs(dht, keys, deadline=deadline, cache=cache))
+
+
 def get_round_and_stage(
     dht: DHT,
 ) -> tuple[int, int]:
@@ -76,7 +425,10 @@ def get_round_and_stage(
 
 
 def get_dht_value(dht: DHT, **kwargs) -> Any | None:
-    wrapper = dht.get(**kwargs)
+    return unwrap_dht_value(dht.get(**kwargs))
+
+
+def unwrap_dht_value(wrapper) -> Any | None:
     if not wrapper:
         return None
 
@@ -84,5 +436,17 @@ def get_dht_value(dht: DHT, **kwargs) -> Any | None:
     value = wrapper.value
     if isinstance(value, dict):
         # Subkeys exist; unwrap ValueWithExpiration.
-        return {k: v.value for k, v in value.items()}
+        value = {k: v.value for k, v in value.items()}
+        if any(is_compact(v) for v in value.values()):
+            # Compact batches (and any plain per-question subkeys); merge them.
+            merged = HashedOutputs()
+            for k, v in value.items():
+                if is_compact(v):
+                    merged.update(decode_outputs(v))
+                else:
+                    merged.update(hash_keys({k: v}))
+            return merged
+        return value
+    if is_compact(value):
+        return decode_outputs(value)
     return value
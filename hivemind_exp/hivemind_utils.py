@@ -1,10 +1,174 @@
-from collections import defaultdict
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Any, Callable, Sequence
 
 import torch
 
 
+def estimate_nbytes(value: Any) -> int:
+    """Approximate size of a value in bytes, used for cache budgets."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class RoundCache:
+    """Per-(round, stage) store of Q: (timestamp, outputs) with bounded memory.
+
+    Only the most recent ``max_rounds`` rounds are kept in memory, within
+    ``max_bytes``. Older stages are spilled to a zlib-compressed SQLite store
+    at ``spill_path`` and remain readable. Without a ``spill_path`` the store
+    is a temporary file, created on the first spill and removed with the
+    cache. ``stats`` reports the cache size, e.g. for ``RoundMetrics.track``.
+    """
+
+    def __init__(
+        self,
+        max_rounds: int = 4,
+        max_bytes: int = 256 * 1024 * 1024,
+        spill_path: str | None = None,
+    ):
+        self.max_rounds = max_rounds
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+
+        self._lock = threading.RLock()
+        self._stages: OrderedDict[tuple[int, int], dict[str, tuple[float, dict]]] = (
+            OrderedDict()
+        )
+        self._stage_nbytes: dict[tuple[int, int], int] = {}
+        self.nbytes = 0
+        self._spill: sqlite3.Connection | None = None
+        self._spill_finalizer = None
+
+    @property
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "stages": len(self._stages),
+                "bytes": self.nbytes,
+                "spilled_stages": len(self._spilled_keys()),
+            }
+
+    def _spill_db(self, create: bool = False) -> sqlite3.Connection | None:
+        if self._spill is None:
+            if self.spill_path is None:
+                if not create:
+                    return None
+                fd, self.spill_path = tempfile.mkstemp(
+                    prefix="round_cache_", suffix=".sqlite"
+                )
+                os.close(fd)
+                self._spill_finalizer = weakref.finalize(
+                    self, _remove_file, self.spill_path
+                )
+            self._spill = sqlite3.connect(self.spill_path, check_same_thread=False)
+            self._spill.execute(
+                "CREATE TABLE IF NOT EXISTS stages "
+                "(round INTEGER, stage INTEGER, blob BLOB, PRIMARY KEY (round, stage))"
+            )
+        return self._spill
+
+    def _spilled_keys(self) -> list[tuple[int, int]]:
+        db = self._spill_db()
+        if db is None:
+            return []
+        return [tuple(row) for row in db.execute("SELECT round, stage FROM stages")]
+
+    def _load_spilled(self, key: tuple[int, int]) -> dict | None:
+        db = self._spill_db()
+        if db is None:
+            return None
+        row = db.execute(
+            "SELECT blob FROM stages WHERE round = ? AND stage = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def _unspill(self, key: tuple[int, int]) -> dict | None:
+        outputs = self._load_spilled(key)
+        if outputs is not None:
+            with self._spill:
+                self._spill.execute(
+                    "DELETE FROM stages WHERE round = ? AND stage = ?", key
+                )
+        return outputs
+
+    def _spill_oldest(self):
+        key, outputs = self._stages.popitem(last=False)
+        self.nbytes -= self._stage_nbytes.pop(key)
+        db = self._spill_db(create=True)
+        blob = zlib.compress(pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL))
+        with db:
+            db.execute("INSERT OR REPLACE INTO stages VALUES (?, ?, ?)", (*key, blob))
+
+    def _evict(self):
+        while len(self._stages) > 1:
+            rounds = {r for r, _ in self._stages}
+            if len(rounds) <= self.max_rounds and self.nbytes <= self.max_bytes:
+                break
+            self._spill_oldest()
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        with self._lock:
+            return key in self._stages or self._load_spilled(key) is not None
+
+    def __getitem__(self, key: tuple[int, int]) -> dict[str, tuple[float, dict]]:
+        with self._lock:
+            if key in self._stages:
+                return self._stages[key]
+            outputs = self._load_spilled(key)
+            if outputs is None:
+                raise KeyError(key)
+            return outputs
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._stages) + len(self._spilled_keys())
+
+    def put(self, r: int, s: int, question: str, value: tuple[float, dict]):
+        key = (r, s)
+        with self._lock:
+            if key not in self._stages:
+                self._stages[key] = self._unspill(key) or {}
+                self._stage_nbytes[key] = estimate_nbytes(self._stages[key])
+                self.nbytes += self._stage_nbytes[key]
+                self._stages = OrderedDict(sorted(self._stages.items()))
+
+            nbytes = estimate_nbytes((question, value))
+            self._stages[key][question] = value
+            self._stage_nbytes[key] += nbytes
+            self.nbytes += nbytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+            self._stage_nbytes.clear()
+            self.nbytes = 0
+            db = self._spill_db()
+            if db is not None:
+                with db:
+                    db.execute("DELETE FROM stages")
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
 @dataclass
 class HivemindNode:
     # Node metadata.
@@ -16,9 +180,10 @@ class HivemindNode:
     # Q&A outputs from the last training step.
     outputs: dict[Any, Any] = field(default_factory=dict)
     # Cache for (r, s): Q: (timestamp, outputs).
-    round_cache: dict[tuple[int, int], dict[str, tuple[float, dict]]] = field(
-        default_factory=lambda: defaultdict(dict)
-    )
+    round_cache: RoundCache = field(init=False)
+    round_cache_rounds: int = 4
+    round_cache_max_bytes: int = 256 * 1024 * 1024
+    round_cache_spill_path: str | None = None  # A temporary file if None.
 
     # Reward outputs from the last training.
     rewards: Sequence[float | int] = field(default_factory=list)
@@ -29,17 +194,25 @@ class HivemindNode:
 
     out_expiration: int = 60 * 60 * 8  # 增加到8小时，减少网络请求
 
+    def __post_init__(self):
+        self.round_cache = RoundCache(
+            max_rounds=self.round_cache_rounds,
+            max_bytes=self.round_cache_max_bytes,
+            spill_path=self.round_cache_spill_path,
+        )
+
     @staticmethod
     def coordinator(*args, **kwargs):
         return HivemindNode(*args, **kwargs, is_coordinator=True)
 
     def get_stage_outputs(self, r, s) -> dict[str, tuple[float, dict]] | None:
-        key = (r, s)
-        if key in self.round_cache:
-            return self.round_cache[key]
+        try:
+            return self.round_cache[(r, s)]
+        except KeyError:
+            return None
 
     def put_stage_outputs(self, r, s, question, value: tuple[float, dict]):
-        self.round_cache[(r, s)][question] = value
+        self.round_cache.put(r, s, question, value)
 
     def clear_stage_cache(self):
         self.round_cache.clear()
@@ -1,29 +1,106 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import hydra
-from genrl.communication.communication import Communication
-from genrl.communication.hivemind.hivemind_backend import (
-    HivemindBackend,
-    HivemindRendezvouz,
-)
 from hydra.utils import instantiate
-from omegaconf import DictConfig, OmegaConf
+from omegaconf import DictConfig
 
 from rgym_exp.src.utils.omega_gpu_resolver import (
     gpu_model_choice_resolver,
 )  # necessary for gpu_model_choice resolver in hydra config
+from rgym_exp.src.utils.startup_profile import (
+    StartupTimeline,
+    install_import_timer,
+    install_instantiate_timer,
+    profiling_enabled,
+    set_active_timeline,
+)
+
+READY_FILE = "ready.json"
+
+
+def _start_dht(cfg: DictConfig):
+    """Start the hivemind DHT; must run before any other thread is started."""
+    from genrl.communication.communication import Communication
+    from genrl.communication.hivemind.hivemind_backend import (
+        HivemindBackend,
+        HivemindRendezvouz,
+    )
+
+    Communication.set_backend(HivemindBackend)
+    HivemindRendezvouz.init(is_master=False)
+    return instantiate(cfg.communication)
+
+
+def _register(cfg: DictConfig, peer_id: str, timeline: StartupTimeline):
+    with timeline.phase("coordinator"):
+        coordinator = instantiate(cfg.coordinator)
+    with timeline.phase("register_peer"):
+        coordinator.register_peer(peer_id)
+    return coordinator
+
+
+def _load_data(cfg: DictConfig, timeline: StartupTimeline):
+    with timeline.phase("data_manager"):
+        return instantiate(cfg.data_manager)
 
 
 @hydra.main(version_base=None)
 def main(cfg: DictConfig):
-    is_master = False
-    HivemindRendezvouz.init(is_master=is_master)
+    timeline = StartupTimeline()
+    set_active_timeline(timeline)
+    ready_path = os.path.join(cfg.log_dir, READY_FILE)
+    if os.path.exists(ready_path):
+        os.remove(ready_path)
+
+    # Opt-in detail: per-module import times and per-_target_ instantiate times.
+    uninstall_timers = []
+    if profiling_enabled():
+        uninstall_timers.append(install_import_timer(timeline))
+        uninstall_timers.append(install_instantiate_timer(timeline))
+
+    # hivemind forks the DHT process, which is only safe while this is the
+    # sole thread, so it starts before the worker threads below. genrl,
+    # torch and the rest are imported on first use inside these phases.
+    game_cfg = cfg.game_manager
+    with timeline.phase("dht_bootstrap"):
+        communication = _start_dht(game_cfg)
+    peer_id = communication.get_id()
 
-    game_manager = instantiate(cfg.game_manager)
+    # Peer registration and dataset setup overlap model loading.
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as pool:
+        network = pool.submit(_register, game_cfg, peer_id, timeline)
+        data = pool.submit(_load_data, game_cfg, timeline)
+        with timeline.phase("model_load"):
+            trainer = instantiate(game_cfg.trainer)
+        coordinator = network.result()
+        data_manager = data.result()
+
+    with timeline.phase("game_manager"):
+        game_manager = instantiate(
+            game_cfg,
+            trainer=trainer,
+            communication=communication,
+            coordinator=coordinator,
+            data_manager=data_manager,
+            preregistered_peer_id=peer_id,
+        )
+
+    for uninstall in reversed(uninstall_timers):
+        uninstall()
+    set_active_timeline(None)
+    from genrl.logging_utils.global_defs import get_logger
+
+    get_logger().info(
+        f"Startup finished in {timeline.elapsed():.1f}s ({timeline.summary()})"
+    )
+    if profiling_enabled():
+        timeline.write_report(cfg.log_dir)
+        get_logger().info(f"Startup profile written to {cfg.log_dir}")
+    timeline.write_readiness(ready_path, peer_id=game_manager.peer_id)
     game_manager.run_game()
 
 
 if __name__ == "__main__":
     os.environ["HYDRA_FULL_ERROR"] = "1"
-    Communication.set_backend(HivemindBackend)
     main()
@@ -12,6 +12,11 @@ from reasoning_gym.dataset import ReseedingDataset
 from reasoning_gym.utils import SYSTEM_PROMPTS
 
 from rgym_exp.src.utils.reward_utils import accuracy_reward
+from rgym_exp.src.utils.sample_cache import CachedSampleStream, SampleCache
+from rgym_exp.src.utils.sample_prefetch import (
+    SamplePrefetcher,
+    wrap_reasoning_gym_item,
+)
 
 
 class ReasoningGymDataManager(LocalMemoryTextDataManager):
@@ -31,6 +36,8 @@ class ReasoningGymDataManager(LocalMemoryTextDataManager):
         batch_item_id_column: Optional[str] = "question",
         system_prompt_id: str = "default",
         chunk_size: int = 500,
+        prefetch_depth: int = 0,
+        sample_cache_dir: Optional[str] = None,
         **kwargs,
     ):
         """Initialize the ReasoningGymDataManager.
@@ -44,6 +51,8 @@ class ReasoningGymDataManager(LocalMemoryTextDataManager):
             batch_item_id_column: Column to use for batch item ID generation
             system_prompt_id: ID of system prompt from reasoning_gym.utils.SYSTEM_PROMPTS
             chunk_size: Size of chunks for ReseedingDataset
+            prefetch_depth: Number of samples generated ahead on a background thread (0 disables)
+            sample_cache_dir: Directory for the on-disk sample cache (None disables)
         """
         super().__init__(
             train_dataset=None,
@@ -64,12 +73,17 @@ class ReasoningGymDataManager(LocalMemoryTextDataManager):
         self.yaml_config_path = yaml_config_path
         self.eval_split_ratio = eval_split_ratio
         self.chunk_size = chunk_size
+        self.prefetch_depth = prefetch_depth
+        self.prefetcher = None
+        self.sample_cache_dir = sample_cache_dir
         self.system_prompt = SYSTEM_PROMPTS.get(
             system_prompt_id, SYSTEM_PROMPTS["default"]
         )
         self.num_transplant_trees = kwargs.get("num_transplant_trees", 1)
         assert self.num_transplant_trees >= 0
         self.num_generations = kwargs.get("num_generations", None)
+        self.transplant_scan_budget = kwargs.get("transplant_scan_budget", None)
+        self.prefer_novel_transplants = kwargs.get("prefer_novel_transplants", True)
         try:
             self.config = CompositeConfig.from_yaml(yaml_config_path)
 
@@ -84,6 +98,28 @@ class ReasoningGymDataManager(LocalMemoryTextDataManager):
 
             self._create_dataset_splits()
 
+            self.sample_source = self.reseeding_dataset
+            if self.sample_cache_dir is not None:
+                cache = SampleCache(
+                    self.sample_cache_dir,
+                    SampleCache.make_key(
+                        yaml_config_path, self.config.seed, self.chunk_size
+                    ),
+                )
+                self.sample_source = CachedSampleStream(
+                    self.composite_dataset,
+                    cache,
+                    self.chunk_size,
+                    flush_every=kwargs.get("sample_cache_flush_every", 16),
+                )
+
+            if self.prefetch_depth > 0:
+                self.prefetcher = SamplePrefetcher(
+                    self.sample_source,
+                    depth=self.prefetch_depth,
+                    wrap_fn=wrap_reasoning_gym_item,
+                )
+
         except Exception as e:
             raise RuntimeError(
                 f"Failed to initialize ReasoningGymDataManager: {str(e)}"
@@ -139,17 +175,14 @@ class ReasoningGymDataManager(LocalMemoryTextDataManager):
             max_samples = min(num_samples, max_samples)
 
         for i in range(max_samples):
-            item = next(self.reseeding_dataset)
+            item = self._next_sample()
 
             idx = i
 
             dataset_dict["question"].append(item["question"])
             dataset_dict["answer"].append(item["answer"])
 
-            metadata = item.get("metadata", {})
-            if not isinstance(metadata, dict):
-                metadata = {"original_metadata": metadata}
-
+            metadata = item["metadata"]
             metadata["dataset_index"] = idx
             metadata["split"] = split
 
@@ -157,6 +190,12 @@ class ReasoningGymDataManager(LocalMemoryTextDataManager):
 
         return Dataset.from_dict(dataset_dict)
 
+    def _next_sample(self) -> Dict[str, Any]:
+        """Return the next wrapped sample, from the prefetcher if enabled."""
+        if self.prefetcher is not None:
+            return next(self.prefetcher)
+        return wrap_reasoning_gym_item(next(self.sample_source))
+
     # --- Helper Methods ---
     def state_to_system_prompt(self, state: WorldState) -> str:
         """Return the system prompt for the reasoning task."""
@@ -254,10 +293,6 @@ class ReasoningGymDataManager(LocalMemoryTextDataManager):
             )
             for pair in transplants:
                 agent, batch_id = pair
-                if agent not in trees:
-                    trees[agent] = {}
-                if batch_id not in trees[agent]:
-                    trees[agent][batch_id] = None
                 payload = transplants[pair]
                 received_states, received_actions, received_metadata = (
                     payload["world_state"],
@@ -266,7 +301,16 @@ class ReasoningGymDataManager(LocalMemoryTextDataManager):
                 )
                 world_state = received_states.environment_states
                 payload_batch_id = generate_md5_hash_id(world_state["question"])
-                assert payload_batch_id == batch_id
+                if payload_batch_id != batch_id:
+                    get_logger().info(
+                        f"Skipping transplant from {agent}: batch id {batch_id} "
+                        "does not match its question hash."
+                    )
+                    continue
+                if agent not in trees:
+                    trees[agent] = {}
+                if batch_id not in trees[agent]:
+                    trees[agent][batch_id] = None
                 if (
                     trees[agent][batch_id] is None
                 ):  # we don't have a tree for this batch item, make one and append actions
@@ -284,29 +328,74 @@ class ReasoningGymDataManager(LocalMemoryTextDataManager):
         world_state = current_state.get_latest_state()
         return world_state
 
+    @staticmethod
+    def _iter_swarm_payloads(current_state: GameState, swarm_states: Dict[Any, Any]):
+        for agent in swarm_states:
+            if agent in current_state.trees:
+                continue
+            for batch_id in swarm_states[agent]:
+                yield agent, batch_id, swarm_states[agent][batch_id]
+
+    def _is_transplantable(self, payload: Any) -> bool:
+        return bool(
+            self.num_generations
+            and hasattr(payload, "actions")
+            and payload.actions is not None
+            and isinstance(payload.actions, list)
+            and len(payload.actions) == self.num_generations
+        )
+
     def transplant_trees(
         self,
         current_state: GameState,
         swarm_states: Dict[Any, Any],
         num_transplants: int,
     ) -> Dict[Tuple[Any], Any]:
-        # Loop through and return a set of num_transplant transplants to add
-        transplants = {}
-        for agent in swarm_states:
-            if agent not in current_state.trees:
-                for batch_id in swarm_states[agent]:
-                    for payload in swarm_states[agent][batch_id]:
-                        if (
-                            self.num_generations
-                            and hasattr(payload, 'actions')
-                            and payload.actions is not None
-                            and isinstance(payload.actions, list) 
-                            and len(payload.actions) == self.num_generations
-                        ):
-                            transplants[(agent, batch_id)] = payload
-        if len(transplants) >= num_transplants:
-            keepers = random.sample(list(transplants), num_transplants)
-        else:
-            keepers = list(transplants)
+        """Select up to num_transplants payloads from agents we have no tree for.
 
-        return {key: transplants[key] for key in keepers}
\ No newline at end of file
+        Eligible payloads are reservoir-sampled during a single scan. When
+        prefer_novel_transplants is set, questions we already hold a tree for
+        are only used to fill remaining slots. The scan stops early once
+        transplant_scan_budget candidates have been seen and enough were found.
+        """
+        if num_transplants <= 0:
+            return {}
+
+        own_batch_ids = set()
+        if self.prefer_novel_transplants:
+            for agent_trees in current_state.trees.values():
+                own_batch_ids.update(agent_trees)
+
+        novel, repeats = [], []
+        seen = {"novel": 0, "repeat": 0}
+        for agent, batch_id, payloads in self._iter_swarm_payloads(
+            current_state, swarm_states
+        ):
+            payload = None
+            for candidate in payloads:
+                if self._is_transplantable(candidate):
+                    payload = candidate
+            if payload is None:
+                continue
+
+            kind = "repeat" if batch_id in own_batch_ids else "novel"
+            reservoir = repeats if kind == "repeat" else novel
+            seen[kind] += 1
+            if len(reservoir) < num_transplants:
+                reservoir.append(((agent, batch_id), payload))
+            else:
+                j = random.randrange(seen[kind])
+                if j < num_transplants:
+                    reservoir[j] = ((agent, batch_id), payload)
+
+            if (
+                self.transplant_scan_budget is not None
+                and seen["novel"] + seen["repeat"] >= self.transplant_scan_budget
+                and len(novel) + len(repeats) >= num_transplants
+            ):
+                break
+
+        keepers = novel[:num_transplants]
+        keepers += repeats[: num_transplants - len(keepers)]
+        random.shuffle(keepers)
+        return dict(keepers)
@@ -2,7 +2,6 @@ import logging
 import os
 import sys
 import time
-from collections import defaultdict
 
 from genrl.blockchain import SwarmCoordinator
 from genrl.communication import Communication
@@ -19,6 +18,11 @@ from genrl.trainer import TrainerModule
 from huggingface_hub import login, whoami
 
 from rgym_exp.src.utils.name_utils import get_name_from_peer_id
+from rgym_exp.src.utils.reward_ledger import RewardLedger
+from rgym_exp.src.utils.round_metrics import RoundMetrics, count_generated
+from rgym_exp.src.utils.round_watcher import RoundStageWatcher
+from rgym_exp.src.utils.startup_profile import startup_phase
+from rgym_exp.src.utils.submission_queue import ChainSubmissionQueue
 
 
 class SwarmGameManager(BaseGameManager, DefaultGameManagerMixin):
@@ -39,6 +43,7 @@ class SwarmGameManager(BaseGameManager, DefaultGameManagerMixin):
         log_dir: str = "logs",
         hf_token: str | None = None,
         hf_push_frequency: int = 20,
+        preregistered_peer_id: str | None = None,
         **kwargs,
     ):
 
@@ -73,17 +78,26 @@ class SwarmGameManager(BaseGameManager, DefaultGameManagerMixin):
 
         # Register peer_id and get current round from the chain
         self.coordinator = coordinator
-        self.coordinator.register_peer(self.peer_id)
-        round, _ = self.coordinator.get_round_and_stage()
+        if preregistered_peer_id != self.peer_id:  # The launcher may already have.
+            with startup_phase("coordinator.register_peer"):
+                self.coordinator.register_peer(self.peer_id)
+        with startup_phase("coordinator.get_round_and_stage"):
+            round, stage = self.coordinator.get_round_and_stage()
         self.state.round = round
         self.communication.step_ = (
             self.state.round
         )  # initialize communication module to contract's round
+        self.round_watcher = RoundStageWatcher(
+            self.coordinator, dht=self.communication.dht
+        )
+        self.round_watcher.start(initial=(round, stage))
+        self._prefetch_evaluation()
 
         # enable push to HF if token was provided
         self.hf_token = hf_token
         if self.hf_token not in [None, "None"]:
-            username = whoami(token=self.hf_token)["name"]
+            with startup_phase("hf.whoami"):
+                username = whoami(token=self.hf_token)["name"]
             model_name = self.trainer.model.config.name_or_path.split("/")[-1]
             model_name += "-Gensyn-Swarm"
             model_name += f"-{self.animal_name}"
@@ -93,7 +107,8 @@ class SwarmGameManager(BaseGameManager, DefaultGameManagerMixin):
             self.hf_push_frequency = hf_push_frequency
             get_logger().info("Logging into Hugging Face Hub...")
 
-            login(self.hf_token)
+            with startup_phase("hf.login"):
+                login(self.hf_token)
 
         get_logger().info(
             f"🐱 Hello 🐈 [{get_name_from_peer_id(self.peer_id)}] 🦮 [{self.peer_id}]!"
@@ -101,87 +116,140 @@ class SwarmGameManager(BaseGameManager, DefaultGameManagerMixin):
         get_logger().info(f"bootnodes: {kwargs.get('bootnodes', [])}")
         get_logger().info(f"Using Model: {self.trainer.model.config.name_or_path}")
 
-        with open(os.path.join(log_dir, f"system_info.txt"), "w") as f:
-            f.write(get_system_info())
+        with startup_phase("system_info"):
+            with open(os.path.join(log_dir, f"system_info.txt"), "w") as f:
+                f.write(get_system_info())
 
         self.batched_signals = 0.0
         self.time_since_submit = time.time() #seconds
         self.submit_period = 1.0 #hours
         self.submitted_this_round = False
+        self.reward_ledger = RewardLedger()
+        self.metrics = RoundMetrics(
+            os.path.join(log_dir, f"round_metrics_{self.animal_name}.jsonl"),
+            os.path.join(log_dir, f"round_metrics_{self.animal_name}.prom"),
+            labels={"peer_id": self.peer_id},
+        )
+        self._instrument_hot_path()
+        self.submission_queue = ChainSubmissionQueue(
+            self.coordinator,
+            self.peer_id,
+            os.path.join(log_dir, f"chain_submissions_{self.animal_name}.json"),
+            on_submitted=self.metrics.on_chain_submitted,
+        )
 
-    def _get_total_rewards_by_agent(self):
-        rewards_by_agent = defaultdict(int)
+    def _instrument_hot_path(self):
+        tokenizer = self.trainer.processing_class
+        generation_config = getattr(self.trainer.model, "generation_config", None)
+        eos_token_id = getattr(generation_config, "eos_token_id", None)
+        if eos_token_id is None:
+            eos_token_id = getattr(tokenizer, "eos_token_id", None)
+        self.metrics.wrap(self.trainer, "generate", "generation_s")
+        self.metrics.wrap(
+            self.trainer.model,
+            "generate",
+            "model_generate_s",
+            on_result=count_generated(
+                eos_token_id, getattr(tokenizer, "pad_token_id", None)
+            ),
+        )
+        self.metrics.wrap(self.rewards, "update_rewards", "reward_s")
+        self.metrics.wrap(self.trainer, "train", "train_s")
+        self.metrics.wrap(self.trainer, "evaluate", "evaluate_s")
+        self.metrics.wrap(self.communication, "all_gather_object", "dht_gather_s")
+
+    def _update_reward_ledger(self):
+        # Only stages not yet folded into the ledger are walked.
         for stage in range(self.state.stage):
-            rewards = self.rewards[stage]
-            for agent_id, agent_rewards in rewards.items():
-                for batch_id, batch_rewards in agent_rewards.items():
-                    tot = 0
-                    for generation_rewards in batch_rewards:
-                        tot += sum(generation_rewards)
-                    rewards_by_agent[agent_id] += tot
-
-        return rewards_by_agent
-
-    def _get_my_rewards(self, signal_by_agent):
-        if len(signal_by_agent) == 0:
+            if not self.reward_ledger.has_stage(stage):
+                self.reward_ledger.add_stage(stage, self.rewards[stage])
+
+    def _get_my_rewards(self):
+        if len(self.reward_ledger) == 0:
             return 0
-        if self.peer_id in signal_by_agent:
-            my_signal = signal_by_agent[self.peer_id]
-        else:
-            my_signal = 0
+        my_signal = self.reward_ledger.total(self.peer_id)
         my_signal = (my_signal + 1) * (my_signal > 0) + my_signal * (
             my_signal <= 0
         )
         return my_signal
 
-    def _try_submit_to_chain(self, signal_by_agent):
+    def _try_submit_to_chain(self):
         elapsed_time_hours = (time.time() - self.time_since_submit) / 3600
         if elapsed_time_hours > self.submit_period:
-            try:
-                self.coordinator.submit_reward(
-                    self.state.round, 0, int(self.batched_signals), self.peer_id
-                )
-                self.batched_signals = 0.0
-                if len(signal_by_agent) > 0:
-                    max_agent, max_signal = max(signal_by_agent.items(), key=lambda x: x[1])
-                else: # if we have no signal_by_agents, just submit ourselves.
-                    max_agent = self.peer_id
-
-                self.coordinator.submit_winners(self.state.round, [max_agent], self.peer_id)
-                self.time_since_submit = time.time()
-                self.submitted_this_round = True
-            except Exception as e:
-                get_logger().exception(
-                    "Failed to submit to chain.\n"
-                    "This is most likely transient and will recover.\n"
-                    "There is no need to kill the program.\n"
-                    "If you encounter this error, please report it to Gensyn by\n"
-                    "filing a github issue here: https://github.com/gensyn-ai/rl-swarm/issues/ \n"
-                    "including the full stacktrace."
-                )
-
+            if len(self.reward_ledger) > 0:
+                max_agent, max_signal = self.reward_ledger.max_agent()
+            else: # if we have no signal_by_agents, just submit ourselves.
+                max_agent = self.peer_id
+
+            # Submission happens on the queue's thread and is retried there.
+            self.submission_queue.submit(
+                self.state.round, int(self.batched_signals), [max_agent]
+            )
+            self.batched_signals = 0.0
+            self.time_since_submit = time.time()
+            self.submitted_this_round = True
 
     def _hook_after_rewards_updated(self):
-        signal_by_agent = self._get_total_rewards_by_agent()
-        self.batched_signals += self._get_my_rewards(signal_by_agent)
-        self._try_submit_to_chain(signal_by_agent)
+        with self.metrics.timed("ledger_s"):
+            self._update_reward_ledger()
+            self.batched_signals += self._get_my_rewards()
+            self._try_submit_to_chain()
 
     def _hook_after_round_advanced(self):
-        self._save_to_hf()
+        finished_round = self.state.round - 1
+        with self.metrics.timed("hf_push_s"):
+            self._save_to_hf()
 
         # Try to submit to chain again if necessary, but don't update our signal twice
+        # (the ledger still holds the round that just finished).
         if not self.submitted_this_round:
-            signal_by_agent = self._get_total_rewards_by_agent()
-            self._try_submit_to_chain(signal_by_agent)
-        
-        # Reset flag for next round
+            self._try_submit_to_chain()
+
+        # Reset flag and ledger for next round
         self.submitted_this_round = False
+        self.reward_ledger.reset()
 
         # Block until swarm round advances
-        self.agent_block()
+        with self.metrics.timed("agent_block_s"):
+            self.agent_block()
+        self._prefetch_evaluation()
+
+        self.metrics.flush(
+            finished_round,
+            pending_chain_submits=self.submission_queue.pending(),
+        )
+
+    def _prefetch_evaluation(self):
+        # Judge questions are keyed by round, so fetch them once the round
+        # this node will actually play is known.
+        prefetch = getattr(self.trainer, "prefetch_evaluation", None)
+        if prefetch is not None:
+            prefetch(self.state)
 
     def _hook_after_game(self):
         self._save_to_hf()
+        if not self.submission_queue.flush(timeout=60.0):
+            get_logger().info(
+                f"{self.submission_queue.pending()} chain submissions still pending; "
+                "they will be retried on the next start."
+            )
+        self.submission_queue.close()
+        self.round_watcher.stop()
+        self._close_reward_fns()
+
+    def _close_reward_fns(self):
+        """Stop reward scoring pools so their workers do not outlive the game."""
+        store = getattr(self.rewards, "reward_fn_store", None)
+        seen = set()
+        # RewardFnStore repeats one RoundRewardFnStore for every round.
+        for round_store in getattr(store, "reward_fn_stores", None) or []:
+            if id(round_store) in seen:
+                continue
+            seen.add(id(round_store))
+            for reward_fn in dict.fromkeys(round_store.reward_fns):
+                close = getattr(reward_fn, "close", None)
+                if close is not None:
+                    close()
 
     def _save_to_hf(self):
         if (
@@ -216,40 +284,26 @@ class SwarmGameManager(BaseGameManager, DefaultGameManagerMixin):
         self, check_interval=5.0, log_timeout=10.0, max_check_interval=60.0 * 15
     ):
         start_time = time.monotonic()
-        fetch_log_time = start_time
-        check_backoff = (
-            check_interval  # Exponential backoff for already finished rounds.
-        )
         while time.monotonic() - start_time < self.train_timeout:
-            curr_time = time.monotonic()
-            _ = self.communication.dht.get_visible_maddrs(latest=True)
-
-            # Retrieve current round and stage.
-            try:
-                round_num, stage = self.coordinator.get_round_and_stage()
-            except Exception as e:
-                if curr_time - fetch_log_time > log_timeout:
-                    get_logger().debug(
-                        f"Could not fetch round and stage: {e}. Next check in {check_interval}s."
+            # The watcher thread polls the chain; we just wait for it to
+            # observe a round we can join.
+            result = self.round_watcher.wait_for(
+                lambda round_num, _: round_num >= self.state.round
+                or round_num == self.max_round - 1,
+                timeout=max_check_interval,
+            )
+            if result is None:
+                current = self.round_watcher.current()
+                if current is not None:
+                    get_logger().info(
+                        f"Already finished round: {current[0]}. Still waiting for round {self.state.round}."
                     )
-                    fetch_log_time = curr_time
-
-                time.sleep(check_interval)
                 continue
 
+            round_num, _ = result
             if round_num >= self.state.round:
                 get_logger().info(f"🐝 Joining round: {round_num}")
-                check_backoff = check_interval  # Reset backoff after successful round
                 self.state.round = round_num  # advance to swarm's round.
-                return
-            else:
-                get_logger().info(
-                    f"Already finished round: {round_num}. Next check in {check_backoff}s."
-                )
-                time.sleep(check_backoff)
-                check_backoff = min(check_backoff * 2, max_check_interval)
-
-            if round_num == self.max_round - 1:
-                return
+            return
 
-        get_logger().info("Training timed out!")
\ No newline at end of file
+        get_logger().info("Training timed out!")
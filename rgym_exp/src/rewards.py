@@ -1,20 +1,33 @@
+from rgym_exp.src.utils.reward_engine import RewardScoringEngine
 from rgym_exp.src.utils.reward_utils import *
 
 
 class RGRewards:
-    def __init__(self):
+    def __init__(
+        self,
+        num_workers: int = 0,
+        item_timeout: float = 10.0,
+        include_formatting: bool = False,
+    ):
         self.stage = 0
         self.reward_fn = self.cumulative_reward
+        self.include_formatting = include_formatting
+        self.engine = RewardScoringEngine(
+            self.cumulative_reward, num_workers=num_workers, item_timeout=item_timeout
+        )
 
     def cumulative_reward(
-        self, completions, answer, metadata, include_formatting=False
+        self, completions, answer, metadata, include_formatting=False, correctness=None
     ):
+        """Reward each completion; ``correctness`` may carry precomputed
+        accuracy scores (as the scoring engine passes them)."""
         if completions is None or not completions or not isinstance(completions, list):
             return [0.0]
-        if answer is None or not answer:
+        if not is_scorable(completions, answer):
             return [0.0] * len(completions)
 
-        correctness = accuracy_reward(completions, answer, metadata, weight=1.0)
+        if correctness is None:
+            correctness = accuracy_reward(completions, answer, metadata, weight=1.0)
         if include_formatting:
             formatting = format_reward(completions, weight=0.1)
             cumulative = [sum(tup) for tup in zip(formatting, correctness)]
@@ -22,19 +35,9 @@ class RGRewards:
         else:
             return correctness
 
+    def close(self):
+        self.engine.close()
+
     def __call__(self, game_state):
-        completions, answers, metadata = parse_game_state(game_state, self.stage)
-        rewards = {}  # Key per agent
-        for agent in completions:
-            rewards[agent] = {}  # Will store a list per batch item
-            for batch_id in completions[agent]:
-                rewards[agent][batch_id] = []
-                for node_idx, _ in enumerate(completions[agent][batch_id]):
-                    rewards[agent][batch_id].append(
-                        self.reward_fn(
-                            completions[agent][batch_id][node_idx],
-                            answers[agent][batch_id][node_idx],
-                            metadata[agent][batch_id][node_idx],
-                        )
-                    )
-        return rewards
+        view = build_stage_view(game_state, self.stage)
+        return self.engine.score_view(view, include_formatting=self.include_formatting)
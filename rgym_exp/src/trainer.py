@@ -1,16 +1,31 @@
 from typing import Any, List
 
-import requests
 import torch
 import torch.utils.data
 from genrl.data import DataManager
 from genrl.logging_utils.global_defs import get_logger
 from genrl.logging_utils.ml_logger import LoggerMixin
+from genrl.misc_utils.utils import generate_md5_hash_id
 from genrl.rewards import RewardManager
 from genrl.state import GameState
 from genrl.trainer.grpo_trainer import GRPOLanguageTrainerModule
 from reasoning_gym.utils import SYSTEM_PROMPTS
 
+from rgym_exp.src.utils.answer_stopping import (
+    AnswerLengthBudget,
+    AnswerStopping,
+    truncate_after_answer,
+)
+from rgym_exp.src.utils.judge_client import JudgeClient
+from rgym_exp.src.utils.kv_prefix import SharedPrefixBatch, prefill, unpad
+from rgym_exp.src.utils.prompt_cache import (
+    PromptEncodingCache,
+    pad_left,
+    split_chat_prompt,
+)
+from rgym_exp.src.utils.replay_buffer import ReplayBuffer, ReplayEntry
+from rgym_exp.src.utils.reward_utils import get_stage_view
+
 
 class GRPOTrainerModule(GRPOLanguageTrainerModule, LoggerMixin):
     """
@@ -28,73 +43,439 @@ class GRPOTrainerModule(GRPOLanguageTrainerModule, LoggerMixin):
         """
         super().__init__(models, **kwargs)
         self.judge_base_url = kwargs.get("judge_base_url", None)
+        self.judge_client = (
+            JudgeClient(
+                self.judge_base_url,
+                timeout=(5.0, kwargs.get("judge_timeout", 30.0)),
+                max_retries=kwargs.get("judge_max_retries", 3),
+            )
+            if self.judge_base_url
+            else None
+        )
+        self.eval_batch_size = kwargs.get("eval_batch_size", 1)
+        self.eval_max_new_tokens = kwargs.get("eval_max_new_tokens", 512)
+
+        prompt_cache_size = kwargs.get("prompt_cache_size", 4096)
+        self.prompt_cache = (
+            PromptEncodingCache(self.processing_class, max_entries=prompt_cache_size)
+            if prompt_cache_size > 0
+            else None
+        )
+
+        # Rows stop at </answer> or at a per-dataset budget learned from
+        # the lengths of this node's past correct completions.
+        self.answer_stopping = (
+            AnswerStopping(self.processing_class)
+            if kwargs.get("answer_stopping", True)
+            else None
+        )
+        self.answer_budget = AnswerLengthBudget(
+            quantile=kwargs.get("answer_budget_quantile", 0.95),
+            margin=kwargs.get("answer_budget_margin", 1.25),
+            min_samples=kwargs.get("answer_budget_min_samples", 16),
+        )
+        # Prefill shared prompt prefixes once and decode all generations of a
+        # prompt together; falls back to one generate call per generation.
+        self.kv_prefix_reuse = kwargs.get("kv_prefix_reuse", True)
+        # Transplanted rollout groups kept for a few rounds and mixed into
+        # later steps with age-weighted advantages. Off unless configured.
+        replay_capacity = kwargs.get("replay_capacity", 0)
+        self.replay_buffer = (
+            ReplayBuffer(
+                capacity=replay_capacity,
+                max_age=kwargs.get("replay_max_age", 4),
+                decay=kwargs.get("replay_decay", 0.5),
+            )
+            if replay_capacity > 0
+            else None
+        )
+        self.replay_groups_per_step = kwargs.get("replay_groups_per_step", 2)
+
+        # Training groups seen and skipped (zero reward variance) this round.
+        self._round_groups = 0
+        self._round_skipped_groups = 0
+
+    @staticmethod
+    def _input_items(inputs) -> List[Any]:
+        if hasattr(inputs, "to_dict"):
+            return [dict(inputs[i]) for i in range(len(inputs))]
+        if isinstance(inputs, dict):
+            return [inputs]
+        return list(inputs)
+
+    def _process_inputs(self, inputs, with_template=True, for_training=False):
+        if not with_template or self.prompt_cache is None:
+            return super()._process_inputs(inputs, with_template, for_training)
+
+        items = self._input_items(inputs)
+        prompts = [split_chat_prompt(item) for item in items]
+        if not prompts or any(prompt is None for prompt in prompts):
+            return super()._process_inputs(inputs, with_template, for_training)
+
+        encoded = [self.prompt_cache.encode(*prompt) for prompt in prompts]
+        if for_training:
+            encoded = [ids for ids in encoded for _ in range(self.num_generations)]
+
+        pad_token_id = self.processing_class.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = self.processing_class.eos_token_id
+        return pad_left(encoded, pad_token_id)
 
     @torch.no_grad()
-    def evaluate(
+    def generate(
+        self, inputs: Any, return_completion_ids: bool = False, stage=0
+    ) -> Any:
+        """
+        Generate num_generations completions per prompt. Each row ends once it
+        closes its answer block or uses up its dataset's token budget, and the
+        prompt prefill is shared by all generations and by the common prefix.
+        """
+        if self.answer_stopping is None and not self.kv_prefix_reuse:
+            return super().generate(inputs, return_completion_ids, stage)
+
+        input_tokens = self._process_inputs(inputs)
+        generate_kwargs = {"generation_config": self.generation_config}
+        budgets = None
+        max_new_tokens = getattr(self.generation_config, "max_new_tokens", None)
+        if self.answer_stopping is not None and max_new_tokens is not None:
+            metadata = [item.get("metadata") for item in self._input_items(inputs)]
+            budgets = self.answer_budget.budgets(metadata, max_new_tokens)
+            generate_kwargs["max_new_tokens"] = max(budgets)
+        if self.processing_class.eos_token_id is not None:
+            # Stopped rows are padded with EOS so the completion mask ends there.
+            generate_kwargs["pad_token_id"] = self.processing_class.eos_token_id
+
+        grouped_ids = None
+        if self.kv_prefix_reuse:
+            try:
+                grouped_ids = self._generate_shared_prefix(
+                    input_tokens, budgets, generate_kwargs
+                )
+            except Exception as e:
+                get_logger().info(f"Disabling KV prefix reuse after error: {e}")
+                self.kv_prefix_reuse = False
+        if grouped_ids is None:
+            grouped_ids = self._generate_per_generation(
+                input_tokens, budgets, generate_kwargs
+            )
+
+        completions = self.processing_class.batch_decode(
+            [ids for group in grouped_ids for ids in group], skip_special_tokens=True
+        )
+        rollout = [
+            completions[i : i + self.num_generations]
+            for i in range(0, len(completions), self.num_generations)
+        ]
+        if return_completion_ids:
+            return rollout, grouped_ids
+        return rollout
+
+    def _stopping_criteria(self, prompt_length: int, budgets):
+        if self.answer_stopping is None:
+            return None
+        return self.answer_stopping.criteria(prompt_length, budgets)
+
+    def _generate_per_generation(self, input_tokens, budgets, generate_kwargs):
+        """One generate call per generation, each re-running the prompt prefill."""
+        prompt_length = input_tokens.input_ids.size(1)
+        grouped_ids = [[] for _ in range(input_tokens.input_ids.size(0))]
+        for _ in range(self.num_generations):
+            outputs = self.model.generate(
+                input_tokens.input_ids.to(self.model.device),
+                attention_mask=input_tokens.attention_mask.to(self.model.device),
+                stopping_criteria=self._stopping_criteria(prompt_length, budgets),
+                **generate_kwargs,
+            )
+            for idx, completion_ids in enumerate(outputs[:, prompt_length:]):
+                grouped_ids[idx].append(completion_ids)
+        return grouped_ids
+
+    def _generate_shared_prefix(self, input_tokens, budgets, generate_kwargs):
+        """Prefill the common prefix once and each prompt once, then decode
+        all num_generations rows per prompt in a single generate call."""
+        repeats = self.num_generations
+        pad_token_id = self.processing_class.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = self.processing_class.eos_token_id
+        batch = SharedPrefixBatch.from_sequences(
+            unpad(input_tokens.input_ids, input_tokens.attention_mask), pad_token_id
+        )
+        cache = prefill(self.model, batch, repeats)
+
+        prompt_length = batch.input_ids.size(1)
+        if budgets is not None:
+            budgets = [budget for budget in budgets for _ in range(repeats)]
+        outputs = self.model.generate(
+            batch.input_ids.repeat_interleave(repeats, dim=0).to(self.model.device),
+            attention_mask=batch.attention_mask.repeat_interleave(repeats, dim=0).to(
+                self.model.device
+            ),
+            past_key_values=cache,
+            stopping_criteria=self._stopping_criteria(prompt_length, budgets),
+            **generate_kwargs,
+        )
+        completion_ids = outputs[:, prompt_length:]
+        return [
+            list(completion_ids[i : i + repeats])
+            for i in range(0, completion_ids.size(0), repeats)
+        ]
+
+    def train(
         self, state: GameState, data_manager: DataManager, reward_manager: RewardManager
     ):
-        base_url = self.judge_base_url
-        if base_url:
-            try:
-                model_name = self.model.name_or_path
-            except AttributeError:
-                model_name = "none"
+        self._observe_answer_lengths(state, reward_manager)
+        self._round_groups = self._round_skipped_groups = 0
+        result = super().train(state, data_manager, reward_manager)
+        if self._round_skipped_groups:
+            get_logger().info(
+                f"Skipped {self._round_skipped_groups}/{self._round_groups} "
+                "zero-advantage groups in training "
+                f"({self._round_skipped_groups / self._round_groups:.0%} of rows)"
+            )
+        return result
 
-            try:
-                request_data = {
-                    "user_id": state.peer_id,
-                    "round_number": state.round,
-                    "model_name": model_name,
-                }
-                response = requests.post(
-                    f"{base_url}/request-question/", json=request_data
+    @staticmethod
+    def _select(items, indices: List[int]):
+        if hasattr(items, "select"):
+            return items.select(indices)
+        return [items[i] for i in indices]
+
+    def step(
+        self,
+        stage: int,
+        state: GameState,
+        data_manager: DataManager,
+        reward_manager: RewardManager,
+        global_step: int,
+    ) -> int:
+        """
+        One GRPO update on a stage, leaving out groups whose rewards are all
+        equal: their advantages are zero, so they add nothing to the gradient.
+        The loss is a per-token mean over the informative groups only, so its
+        scale does not shrink as more groups turn out degenerate.
+        When replay is enabled, transplanted groups from earlier rounds are
+        mixed into steps that have informative groups of their own, with
+        advantages scaled by their age weight.
+        """
+        global_step += 1
+
+        # Prepare stage's inputs
+        stage_inputs = state.get_stage_state(stage)
+        stage_inputs, index_mapping = data_manager.prepare_input(stage_inputs, stage)
+        assert stage_inputs is not None, f"No inputs found for stage {stage}"
+        # prepare_input maps each input row to its (agent, batch_id, node).
+        index_mapping = [index_mapping[idx] for idx in range(len(index_mapping))]
+        stage_actions = state.get_stage_actions(stage)
+        stage_outputs = [
+            stage_actions[agent][batch_id][node]
+            for agent, batch_id, node in index_mapping
+        ]
+        stage_rewards = reward_manager[stage]
+        rewards = torch.tensor(
+            [
+                stage_rewards[agent][batch_id][node]
+                for agent, batch_id, node in index_mapping
+            ],
+            dtype=torch.float32,
+        )
+
+        # Drop zero-variance groups before any tokenization or forward pass.
+        keep = (rewards.max(dim=1).values - rewards.min(dim=1).values) > 0
+        kept = keep.nonzero().flatten().tolist()
+        skipped = len(index_mapping) - len(kept)
+        self._round_groups += len(index_mapping)
+        self._round_skipped_groups += skipped
+        metrics = {
+            "train/rewards": rewards.mean().item(),
+            "train/skipped_group_frac": skipped / max(len(index_mapping), 1),
+        }
+        replayed = []
+        if self.replay_buffer is not None:
+            self._remember_transplants(
+                stage, state, stage_inputs, stage_outputs, rewards, index_mapping, kept
+            )
+            # Replay only supplements fresh informative groups; a degenerate
+            # stage never steps on stale data alone.
+            if kept:
+                replayed = self.replay_buffer.sample(
+                    self.replay_groups_per_step, stage, state.round
                 )
+            metrics["train/replayed_groups"] = len(replayed)
+        if not kept:
+            # A fully degenerate stage: no loss, no optimizer step.
+            self.log(metrics, global_step)
+            return global_step
+        if skipped:
+            stage_inputs = self._select(stage_inputs, kept)
+            stage_outputs = [stage_outputs[i] for i in kept]
+            rewards = rewards[keep]
+        weights = torch.ones(len(kept))
+        if replayed:
+            stage_inputs = self._input_items(stage_inputs) + [
+                entry.prompt for entry, _ in replayed
+            ]
+            stage_outputs = stage_outputs + [entry.completions for entry, _ in replayed]
+            replayed_rewards = torch.tensor(
+                [entry.rewards for entry, _ in replayed], dtype=torch.float32
+            )
+            rewards = torch.cat([rewards, replayed_rewards])
+            weights = torch.cat(
+                [weights, torch.tensor([weight for _, weight in replayed])]
+            )
+
+        # Prepare batch
+        model_inputs = {}
+        processed_inputs = self._process_inputs(stage_inputs, for_training=True)
+        model_inputs["prompt_ids"] = processed_inputs.input_ids.to(self.model.device)
+        model_inputs["prompt_mask"] = processed_inputs.attention_mask.to(
+            self.model.device
+        )
+        processed_outputs = self._process_inputs(
+            stage_outputs, with_template=False, for_training=True
+        )
+        model_inputs["completion_ids"] = processed_outputs.input_ids.to(
+            self.model.device
+        )
+        model_inputs["completion_mask"] = processed_outputs.attention_mask.to(
+            self.model.device
+        )
+
+        with torch.no_grad():
+            advantages = rewards - rewards.mean(dim=1, keepdim=True)
+            if rewards.shape[1] > 1:
+                advantages /= rewards.std(dim=1, keepdim=True) + 1e-8
+            # Replayed groups count less the older they are (age weight).
+            advantages *= weights.unsqueeze(1)
+        model_inputs["advantages"] = torch.flatten(advantages).to(self.model.device)
+        model_inputs["old_per_token_logps"] = None
+
+        with self.autocast:
+            loss = self.compute_loss(self.model, model_inputs)
+
+        loss.backward()
+        self.optimizer.step()
+        self.model.zero_grad()
+
+        metrics["train/loss"] = loss.cpu().mean().item()
+        self.log(metrics, global_step)
 
-                if response.status_code == 200:
-                    result = response.json()
-                    get_logger().debug(f'recieved question: {result["question"]}')
-                else:
-                    get_logger().debug(
-                        f"Failed to recieve question: {response.status_code}"
-                    )
-                    return
-
-                prompt = [
-                    {"role": "system", "content": SYSTEM_PROMPTS["default"]},
-                    {"role": "user", "content": result["question"]},
-                ]
-                input_ids = self.processing_class.apply_chat_template(
-                    prompt,
+        self.cleanup_step()
+
+        return global_step
+
+    def _remember_transplants(
+        self, stage, state, stage_inputs, stage_outputs, rewards, index_mapping, kept
+    ):
+        """Buffer informative groups that other peers generated for later steps."""
+        for i in kept:
+            agent = index_mapping[i][0]
+            if agent == state.peer_id or len(stage_outputs[i]) != self.num_generations:
+                continue
+            prompt = dict(stage_inputs[i])
+            question = split_chat_prompt(prompt)
+            key = (agent, generate_md5_hash_id(question[1] if question else repr(prompt)))
+            self.replay_buffer.add(
+                key,
+                ReplayEntry(
+                    prompt=prompt,
+                    completions=list(stage_outputs[i]),
+                    rewards=rewards[i].tolist(),
+                    stage=stage,
+                    round=state.round,
+                ),
+            )
+
+    def _observe_answer_lengths(self, state: GameState, reward_manager: RewardManager):
+        """Feed token lengths of this node's correct completions to the budgets."""
+        texts, sources = [], []
+        try:
+            for stage in range(state.stage):
+                view = get_stage_view(state, stage)
+                stage_rewards = reward_manager[stage]
+                for (agent, batch_id, node), completions, metadata in zip(
+                    view.index, view.completions, view.metadata
+                ):
+                    if agent != state.peer_id:
+                        continue
+                    rewards = stage_rewards[agent][batch_id][node]
+                    for completion, reward in zip(completions, rewards):
+                        text = truncate_after_answer(completion)
+                        if reward >= 1.0 and text is not None:
+                            texts.append(text)
+                            sources.append(metadata.get("source_dataset"))
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            get_logger().debug(f"Could not collect answer lengths: {e}")
+
+        if texts:
+            encoded = self.processing_class(texts, add_special_tokens=False)
+            for source, ids in zip(sources, encoded["input_ids"]):
+                self.answer_budget.observe(source, len(ids))
+
+    def _generate_judge_answers(self, questions: List[str]) -> List[str]:
+        """Answer judge questions with a single left-padded, batched generate call."""
+        system_prompt = SYSTEM_PROMPTS["default"]
+        if self.prompt_cache is not None:
+            encoded = [
+                self.prompt_cache.encode(system_prompt, question)
+                for question in questions
+            ]
+        else:
+            encoded = [
+                self.processing_class.apply_chat_template(
+                    [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": question},
+                    ],
                     tokenize=True,
                     add_generation_prompt=True,
-                    return_tensors="pt",
-                )
-                input_ids = input_ids.to(self.model.device)
-                outputs = self.model.generate(input_ids, max_new_tokens=512)
-                answer = self.processing_class.decode(
-                    outputs[0], skip_special_tokens=True
-                )
-                session_id = result["session_id"]
-                submission_data = {
-                    "session_id": session_id,
-                    "round_number": state.round,
-                    "user_answer": answer,
-                }
-                response = requests.post(
-                    f"{base_url}/submit-answer/", json=submission_data
                 )
+                for question in questions
+            ]
 
-                if response.status_code == 200:
-                    result = response.json()
-                    get_logger().debug(f"Score: {result['score']}")
-                    return
-                else:
-                    get_logger().debug(
-                        f"Failed to submit answer: {response.status_code}"
-                    )
-                    return
-            except Exception as e:
-                get_logger().debug(f"Failed to evaluate: {e}")
-                return
-        else:
+        pad_token_id = self.processing_class.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = self.processing_class.eos_token_id
+        batch = pad_left(encoded, pad_token_id)
+        outputs = self.model.generate(
+            batch.input_ids.to(self.model.device),
+            attention_mask=batch.attention_mask.to(self.model.device),
+            max_new_tokens=self.eval_max_new_tokens,
+            pad_token_id=pad_token_id,
+            stopping_criteria=(
+                self.answer_stopping.criteria(batch.input_ids.size(1))
+                if self.answer_stopping is not None
+                else None
+            ),
+        )
+        return self.processing_class.batch_decode(outputs, skip_special_tokens=True)
+
+    def _model_name(self) -> str:
+        try:
+            return self.model.name_or_path
+        except AttributeError:
+            return "none"
+
+    def prefetch_evaluation(self, state: GameState):
+        """Start fetching judge questions for the round the node just joined,
+        so they are ready by the time evaluate runs for it."""
+        if self.judge_client is not None:
+            self.judge_client.prefetch_questions(
+                state.peer_id, state.round, self._model_name(), self.eval_batch_size
+            )
+
+    @torch.no_grad()
+    def evaluate(
+        self, state: GameState, data_manager: DataManager, reward_manager: RewardManager
+    ):
+        if self.judge_client is None:
             return
+
+        try:
+            questions = self.judge_client.questions_for_round(state.round)
+            if questions:
+                answers = self._generate_judge_answers(
+                    [question["question"] for question in questions]
+                )
+                self.judge_client.submit_answers_async(state.round, questions, answers)
+        except Exception as e:
+            get_logger().debug(f"Failed to evaluate: {e}")
@@ -0,0 +1,112 @@
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList, StopStringCriteria
+
+ANSWER_CLOSE_TAG = "</answer>"
+
+
+class TokenBudgetCriteria(StoppingCriteria):
+    """Finishes each row once it has generated its own number of new tokens."""
+
+    def __init__(self, prompt_length: int, budgets: torch.Tensor):
+        self.prompt_length = prompt_length
+        self.budgets = budgets
+
+    def __call__(self, input_ids: torch.LongTensor, scores, **kwargs) -> torch.BoolTensor:
+        if self.budgets.device != input_ids.device:
+            self.budgets = self.budgets.to(input_ids.device)
+        return (input_ids.shape[-1] - self.prompt_length) >= self.budgets
+
+
+class AnswerLengthBudget:
+    """Per-``source_dataset`` token budgets learned from past correct completions.
+
+    Once a dataset has ``min_samples`` observed lengths, its budget is the
+    ``quantile`` of the last ``window`` lengths times ``margin``, clamped to
+    ``[floor, max_new_tokens]``. Datasets without enough history get the full
+    ``max_new_tokens``.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        margin: float = 1.25,
+        min_samples: int = 16,
+        window: int = 256,
+        floor: int = 64,
+    ):
+        self.quantile = quantile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.window = window
+        self.floor = floor
+        self._lock = threading.Lock()
+        self._lengths: Dict[str, deque] = {}
+        self._budgets: Dict[str, int] = {}
+
+    def observe(self, source_dataset: Optional[str], length: int):
+        if source_dataset is None:
+            return
+        with self._lock:
+            lengths = self._lengths.setdefault(
+                source_dataset, deque(maxlen=self.window)
+            )
+            lengths.append(length)
+            if len(lengths) >= self.min_samples:
+                ordered = sorted(lengths)
+                rank = min(len(ordered) - 1, int(self.quantile * len(ordered)))
+                self._budgets[source_dataset] = max(
+                    self.floor, int(ordered[rank] * self.margin)
+                )
+
+    def budget(self, source_dataset: Optional[str], max_new_tokens: int) -> int:
+        with self._lock:
+            learned = self._budgets.get(source_dataset)
+        return max_new_tokens if learned is None else min(learned, max_new_tokens)
+
+    def budgets(self, metadata: List[Any], max_new_tokens: int) -> List[int]:
+        return [
+            self.budget(
+                meta.get("source_dataset") if isinstance(meta, dict) else None,
+                max_new_tokens,
+            )
+            for meta in metadata
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._budgets)
+
+
+class AnswerStopping:
+    """Builds stopping criteria that end rows at ``</answer>`` or their budget.
+
+    The stop-string table is expensive to build, so it is made once per
+    tokenizer and shared by every generate call.
+    """
+
+    def __init__(self, tokenizer, stop_strings: Optional[List[str]] = None):
+        self.stop_criteria = StopStringCriteria(
+            tokenizer, stop_strings or [ANSWER_CLOSE_TAG]
+        )
+
+    def criteria(
+        self, prompt_length: int, budgets: Optional[List[int]] = None
+    ) -> StoppingCriteriaList:
+        criteria = StoppingCriteriaList([self.stop_criteria])
+        if budgets is not None and len(set(budgets)) > 1:
+            # A uniform budget is already enforced by max_new_tokens.
+            criteria.append(
+                TokenBudgetCriteria(prompt_length, torch.tensor(budgets))
+            )
+        return criteria
+
+
+def truncate_after_answer(completion: str) -> Optional[str]:
+    """Return the completion through its first ``</answer>``, if it has one."""
+    end = completion.find(ANSWER_CLOSE_TAG)
+    return None if end < 0 else completion[: end + len(ANSWER_CLOSE_TAG)]
+
@@ -0,0 +1,155 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from genrl.logging_utils.global_defs import get_logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class JudgeClient:
+    """Client for the swarm judge's /request-question/ and /submit-answer/ API.
+
+    Requests go through a pooled keep-alive session with explicit timeouts and
+    bounded retries. Question fetching and answer submission can run on a
+    background worker so the training loop never waits on the judge.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: Tuple[float, float] = (5.0, 30.0),
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_size: int = 4,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Both endpoints are non-idempotent POSTs, so they are only retried
+        # when the judge cannot have acted on them: failed connections, and
+        # 429/503 responses where it refused the request. Read timeouts and
+        # gateway errors (502/504) are not retried, so an answer cannot be
+        # submitted twice.
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 503),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"},
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="judge-client"
+        )
+        self._prefetched: Optional[Tuple[int, Future]] = None
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        response = self.session.post(
+            f"{self.base_url}/{path}/", json=payload, timeout=self.timeout
+        )
+        if response.status_code != 200:
+            get_logger().debug(f"Judge {path} failed: {response.status_code}")
+            return None
+        return response.json()
+
+    def request_questions(
+        self, user_id: str, round_number: int, model_name: str, count: int
+    ) -> List[Dict[str, Any]]:
+        questions = []
+        for _ in range(count):
+            result = self._post(
+                "request-question",
+                {
+                    "user_id": user_id,
+                    "round_number": round_number,
+                    "model_name": model_name,
+                },
+            )
+            if result is None:
+                break
+            get_logger().debug(f'recieved question: {result["question"]}')
+            questions.append(result)
+        return questions
+
+    def submit_answers(
+        self, round_number: int, questions: List[Dict[str, Any]], answers: List[str]
+    ):
+        for question, answer in zip(questions, answers):
+            result = self._post(
+                "submit-answer",
+                {
+                    "session_id": question["session_id"],
+                    "round_number": round_number,
+                    "user_answer": answer,
+                },
+            )
+            if result is not None:
+                get_logger().debug(f"Score: {result['score']}")
+
+    def prefetch_questions(
+        self, user_id: str, round_number: int, model_name: str, count: int
+    ) -> Future:
+        """Start fetching questions for ``round_number`` in the background."""
+        if self._prefetched is not None and self._prefetched[0] == round_number:
+            return self._prefetched[1]
+        future = self._executor.submit(
+            self.request_questions, user_id, round_number, model_name, count
+        )
+        self._prefetched = (round_number, future)
+        return future
+
+    def questions_for_round(self, round_number: int) -> List[Dict[str, Any]]:
+        """Return the questions prefetched for ``round_number``.
+
+        Never waits on the judge: if no prefetch for this round has finished,
+        the round's evaluation is skipped and an empty list is returned.
+        """
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is None:
+            get_logger().info(
+                f"No judge questions prefetched for round {round_number}, skipping evaluation."
+            )
+            return []
+
+        prefetched_round, future = prefetched
+        if prefetched_round != round_number:
+            get_logger().info(
+                f"Judge questions were prefetched for round {prefetched_round}, "
+                f"not {round_number}, skipping evaluation."
+            )
+            return []
+        if not future.done():
+            get_logger().info(
+                f"Judge questions for round {round_number} are not ready, skipping evaluation."
+            )
+            return []
+        try:
+            return future.result()
+        except Exception as e:
+            get_logger().debug(f"Prefetched judge questions failed: {e}")
+            return []
+
+    def submit_answers_async(
+        self, round_number: int, questions: List[Dict[str, Any]], answers: List[str]
+    ) -> Future:
+        future = self._executor.submit(
+            self.submit_answers, round_number, questions, answers
+        )
+        future.add_done_callback(_log_failure)
+        return future
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+def _log_failure(future: Future):
+    if not future.cancelled() and future.exception() is not None:
+        get_logger().debug(f"Failed to submit answers: {future.exception()}")
@@ -0,0 +1,101 @@
+from dataclasses import dataclass
+from typing import List
+
+import torch
+from transformers import DynamicCache
+
+
+def longest_common_prefix(sequences: List[List[int]]) -> int:
+    """Length of the token prefix shared by every sequence."""
+    shortest = min(sequences, key=len)
+    for i, token in enumerate(shortest):
+        if any(seq[i] != token for seq in sequences):
+            return i
+    return len(shortest)
+
+
+def unpad(input_ids: torch.Tensor, attention_mask: torch.Tensor) -> List[List[int]]:
+    return [
+        ids[mask.bool()].tolist() for ids, mask in zip(input_ids, attention_mask)
+    ]
+
+
+@dataclass
+class SharedPrefixBatch:
+    """Prompts laid out as ``[shared prefix][masked gap][own suffix]``.
+
+    Putting the padding between the shared prefix and each row's suffix keeps
+    the prefix in the same columns for every row, so its keys and values can
+    be computed once and broadcast. Position ids follow the attention mask,
+    so each row sees exactly the positions it would have under left padding.
+    """
+
+    input_ids: torch.Tensor
+    attention_mask: torch.Tensor
+    prefix_length: int
+
+    @classmethod
+    def from_sequences(
+        cls, sequences: List[List[int]], pad_token_id: int
+    ) -> "SharedPrefixBatch":
+        # Every row keeps at least its last token out of the prefill.
+        prefix_length = min(
+            longest_common_prefix(sequences), min(len(seq) for seq in sequences) - 1
+        )
+        suffix_length = max(len(seq) for seq in sequences) - prefix_length
+        width = prefix_length + suffix_length
+        input_ids = torch.full((len(sequences), width), pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(sequences), width), dtype=torch.long)
+        for row, seq in enumerate(sequences):
+            input_ids[row, :prefix_length] = torch.tensor(seq[:prefix_length])
+            attention_mask[row, :prefix_length] = 1
+            suffix = seq[prefix_length:]
+            input_ids[row, width - len(suffix) :] = torch.tensor(suffix)
+            attention_mask[row, width - len(suffix) :] = 1
+        return cls(input_ids, attention_mask, prefix_length)
+
+    @property
+    def position_ids(self) -> torch.Tensor:
+        position_ids = self.attention_mask.cumsum(-1) - 1
+        return position_ids.masked_fill(self.attention_mask == 0, 1)
+
+
+@torch.no_grad()
+def prefill(model, batch: SharedPrefixBatch, repeats: int) -> DynamicCache:
+    """Prefill every prompt token except the last, once per unique prefix.
+
+    The shared prefix runs as a single row and is broadcast to the batch; the
+    per-row suffixes run once; the cache is then repeated ``repeats`` times
+    per row (``repeat_interleave`` order) so all generations of a prompt
+    decode from it. Pass the returned cache to ``model.generate`` together
+    with the full, equally repeated ``input_ids`` and ``attention_mask``.
+    """
+    device = model.device
+    input_ids = batch.input_ids.to(device)
+    attention_mask = batch.attention_mask.to(device)
+    position_ids = batch.position_ids.to(device)
+    prefix_length = batch.prefix_length
+    width = input_ids.size(1)
+
+    cache = DynamicCache()
+    if prefix_length > 0:
+        model(
+            input_ids=input_ids[:1, :prefix_length],
+            attention_mask=attention_mask[:1, :prefix_length],
+            position_ids=position_ids[:1, :prefix_length],
+            past_key_values=cache,
+            use_cache=True,
+        )
+        cache.batch_repeat_interleave(input_ids.size(0))
+    if width - 1 > prefix_length:
+        model(
+            input_ids=input_ids[:, prefix_length:-1],
+            attention_mask=attention_mask[:, :-1],
+            position_ids=position_ids[:, prefix_length:-1],
+            past_key_values=cache,
+            cache_position=torch.arange(prefix_length, width - 1, device=device),
+            use_cache=True,
+        )
+    if repeats > 1:
+        cache.batch_repeat_interleave(repeats)
+    return cache
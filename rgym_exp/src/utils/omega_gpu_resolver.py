@@ -1,11 +1,12 @@
 import random
 
-import torch
 from omegaconf import OmegaConf
 
 
 def get_gpu_vram():
     """Returns the total VRAM of the first available GPU in GiB."""
+    import torch  # Deferred so registering the resolver stays cheap.
+
     if not torch.cuda.is_available():
         return 0
 
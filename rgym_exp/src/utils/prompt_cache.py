@@ -0,0 +1,131 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+from reasoning_gym.utils import SYSTEM_PROMPTS
+from transformers import BatchEncoding
+
+_SYSTEM_PROMPT_IDS = {prompt: prompt_id for prompt_id, prompt in SYSTEM_PROMPTS.items()}
+
+
+def system_prompt_id(system_prompt: str) -> str:
+    """Return the SYSTEM_PROMPTS id for a prompt, or a content hash for custom ones."""
+    if system_prompt in _SYSTEM_PROMPT_IDS:
+        return _SYSTEM_PROMPT_IDS[system_prompt]
+    return hashlib.md5(system_prompt.encode()).hexdigest()
+
+
+def split_chat_prompt(item: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Return (system, user) contents of a prepared input, if it has that shape."""
+    prompt = item.get("prompt")
+    if isinstance(prompt, list):
+        if (
+            len(prompt) == 2
+            and prompt[0].get("role") == "system"
+            and prompt[1].get("role") == "user"
+        ):
+            return prompt[0]["content"], prompt[1]["content"]
+        return None
+    if "system_prompt" in item and "user_prompt" in item:
+        return item["system_prompt"], item["user_prompt"]
+    return None
+
+
+def pad_left(sequences: List[List[int]], pad_token_id: int) -> BatchEncoding:
+    """Left-pad token id lists into input_ids/attention_mask tensors."""
+    max_len = max(len(ids) for ids in sequences)
+    input_ids = torch.full((len(sequences), max_len), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(sequences), max_len), dtype=torch.long)
+    for row, ids in enumerate(sequences):
+        if ids:
+            input_ids[row, max_len - len(ids) :] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, max_len - len(ids) :] = 1
+    return BatchEncoding({"input_ids": input_ids, "attention_mask": attention_mask})
+
+
+class PromptEncodingCache:
+    """LRU cache of chat-templated (system, user) prompt token ids.
+
+    Entries are keyed by (tokenizer name, system prompt id, md5 of the
+    question). On a miss, the constant system-prompt prefix is tokenized once
+    and concatenated with the tokenized remainder; the split is checked
+    against a full tokenization the first time it is used and abandoned for
+    that system prompt if the two differ.
+    """
+
+    def __init__(self, tokenizer, max_entries: int = 4096):
+        self.tokenizer = tokenizer
+        self.tokenizer_name = getattr(
+            tokenizer, "name_or_path", type(tokenizer).__name__
+        )
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], List[int]]" = OrderedDict()
+        # system prompt id -> (prefix text, prefix ids), or None if unusable.
+        self._prefixes: Dict[str, Optional[Tuple[str, List[int]]]] = {}
+        self._verified: set = set()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def _tokenize(self, text: str) -> List[int]:
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def _get_prefix(
+        self, prompt_id: str, system_prompt: str
+    ) -> Optional[Tuple[str, List[int]]]:
+        if prompt_id not in self._prefixes:
+            prefix_text = self.tokenizer.apply_chat_template(
+                [{"role": "system", "content": system_prompt}], tokenize=False
+            )
+            self._prefixes[prompt_id] = (prefix_text, self._tokenize(prefix_text))
+        return self._prefixes[prompt_id]
+
+    def _encode(self, prompt_id: str, system_prompt: str, question: str) -> List[int]:
+        text = self.tokenizer.apply_chat_template(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": question},
+            ],
+            tokenize=False,
+            add_generation_prompt=True,
+        )
+        prefix = self._get_prefix(prompt_id, system_prompt)
+        if prefix is None or not text.startswith(prefix[0]):
+            return self._tokenize(text)
+
+        ids = prefix[1] + self._tokenize(text[len(prefix[0]) :])
+        if prompt_id not in self._verified:
+            full_ids = self._tokenize(text)
+            if full_ids != ids:
+                # Token merges cross the prefix boundary for this template.
+                self._prefixes[prompt_id] = None
+                return full_ids
+            self._verified.add(prompt_id)
+        return ids
+
+    def encode(self, system_prompt: str, question: str) -> List[int]:
+        prompt_id = system_prompt_id(system_prompt)
+        key = (
+            self.tokenizer_name,
+            prompt_id,
+            hashlib.md5(question.encode()).hexdigest(),
+        )
+        ids = self._entries.get(key)
+        if ids is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return ids
+
+        self.misses += 1
+        ids = self._encode(prompt_id, system_prompt, question)
+        self._entries[key] = ids
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return ids
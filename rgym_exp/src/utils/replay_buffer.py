@@ -0,0 +1,83 @@
+import random
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+@dataclass
+class ReplayEntry:
+    """One group of rollouts another peer generated for a question."""
+
+    prompt: Dict[str, Any]  # prepared input item, as passed to the trainer
+    completions: List[str]
+    rewards: List[float]
+    stage: int
+    round: int
+
+
+class ReplayBuffer:
+    """Bounded buffer of transplanted rollout groups, reused for later steps.
+
+    Entries are keyed (e.g. by question hash and source peer) so re-received
+    groups replace older copies. Groups older than ``max_age`` rounds are
+    evicted, then the oldest ones once ``capacity`` is exceeded. Sampling is
+    weighted by the age weight ``decay ** age``, which is returned with each
+    entry so the trainer can scale the group's advantages and trust stale
+    rollouts less. Peers do not send the log-probs of the policy that
+    generated a group, so this is a heuristic, not an importance-sampling
+    correction.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        max_age: int = 4,
+        decay: float = 0.5,
+        seed: Optional[int] = None,
+    ):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.decay = decay
+        self._rng = random.Random(seed)
+        self._entries: "OrderedDict[Hashable, ReplayEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: Hashable, entry: ReplayEntry):
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        self.evict(entry.round)
+
+    def evict(self, current_round: int):
+        stale = [
+            key
+            for key, entry in self._entries.items()
+            if current_round - entry.round > self.max_age
+        ]
+        for key in stale:
+            del self._entries[key]
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def age_weight(self, entry: ReplayEntry, current_round: int) -> float:
+        return self.decay ** max(current_round - entry.round, 0)
+
+    def sample(
+        self, k: int, stage: int, current_round: int, min_age: int = 1
+    ) -> List[Tuple[ReplayEntry, float]]:
+        """Draw up to k distinct entries for a stage, at least min_age rounds old."""
+        self.evict(current_round)
+        candidates = [
+            (entry, self.age_weight(entry, current_round))
+            for entry in self._entries.values()
+            if entry.stage == stage and current_round - entry.round >= min_age
+        ]
+        if k <= 0 or not candidates:
+            return []
+        # Weighted sampling without replacement (Efraimidis-Spirakis keys).
+        candidates.sort(
+            key=lambda item: self._rng.random() ** (1.0 / max(item[1], 1e-12)),
+            reverse=True,
+        )
+        return candidates[:k]
@@ -0,0 +1,164 @@
+import json
+import multiprocessing
+from multiprocessing.pool import Pool
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from genrl.logging_utils.global_defs import get_logger
+from reasoning_gym.utils import extract_answer
+
+from rgym_exp.src.utils.reward_utils import StageView, is_scorable, score_answer
+
+
+def _score_item(
+    prediction: str, answer: Any, metadata: Optional[Dict[str, Any]]
+) -> float:
+    # Runs inside pool workers; scorers are resolved once per process via get_scorer.
+    return score_answer(prediction, answer, metadata=metadata)
+
+
+def _content_key(value: Any) -> Hashable:
+    """A hashable key that is equal for equal contents (dicts, lists, ...)."""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        pass
+    try:
+        return json.dumps(value, sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+class RewardScoringEngine:
+    """Scores the columnar StageView of a game stage.
+
+    The view's nodes form a single work list and identical
+    (prediction, answer, metadata) items are scored once. When
+    ``num_workers > 0`` unique items are fanned out over a process pool with a
+    per-item timeout; a worker stuck past it is terminated and the items that
+    had not finished are re-submitted to a fresh pool. Items are scored by
+    ``score_fn``, which must be picklable for the pool. Per-node rewards are
+    assembled by ``reward_fn`` (``RGRewards.cumulative_reward``), which is
+    handed the precomputed correctness scores. Call ``close`` to stop the
+    pool's workers.
+    """
+
+    def __init__(
+        self,
+        reward_fn: Callable[..., List[float]],
+        num_workers: int = 0,
+        item_timeout: float = 10.0,
+        timeout_reward: float = 0.0,
+        score_fn: Callable[[str, Any, Any], float] = _score_item,
+    ):
+        self.reward_fn = reward_fn
+        self.score_fn = score_fn
+        self.num_workers = num_workers
+        self.item_timeout = item_timeout
+        self.timeout_reward = timeout_reward
+        self._pool: Optional[Pool] = None
+
+    def _get_pool(self) -> Pool:
+        if self._pool is None:
+            self._pool = multiprocessing.get_context("spawn").Pool(self.num_workers)
+        return self._pool
+
+    def _reset_pool(self):
+        if self._pool is not None:
+            # terminate() kills workers even if a scorer is stuck in them.
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def close(self):
+        self._reset_pool()
+
+    def _score_unique(self, items: List[Tuple[str, Any, Any]]) -> List[float]:
+        if self.num_workers <= 0 or len(items) < 2:
+            return [self.score_fn(*item) for item in items]
+
+        scores: List[Optional[float]] = [None] * len(items)
+        pending = list(range(len(items)))
+        while pending:
+            pool = self._get_pool()
+            results = [(i, pool.apply_async(self.score_fn, items[i])) for i in pending]
+            pending = []
+            for n, (i, result) in enumerate(results):
+                try:
+                    scores[i] = result.get(timeout=self.item_timeout)
+                except multiprocessing.TimeoutError:
+                    get_logger().debug(
+                        f"Reward scoring exceeded {self.item_timeout}s; "
+                        "restarting the scoring pool."
+                    )
+                    scores[i] = self.timeout_reward
+                    # Keep what already finished and re-submit the rest.
+                    for j, other in results[n + 1 :]:
+                        if other.ready() and other.successful():
+                            scores[j] = other.get()
+                        else:
+                            pending.append(j)
+                    self._reset_pool()
+                    break
+                except Exception as e:
+                    get_logger().debug(f"Reward scoring failed: {e}")
+                    scores[i] = self.timeout_reward
+        return scores
+
+    def score_nodes(
+        self,
+        completions: List[Any],
+        answers: List[Any],
+        metadata: List[Any],
+        include_formatting: bool = False,
+    ) -> List[List[float]]:
+        """Score a flat list of nodes, each with its list of completions."""
+        unique: Dict[Tuple[Hashable, Hashable, Hashable], int] = {}
+        unique_items: List[Tuple[str, Any, Any]] = []
+        # Per node: None for unscorable nodes, otherwise indices into unique_items.
+        plan: List[Optional[List[int]]] = []
+
+        for node_completions, answer, meta in zip(completions, answers, metadata):
+            if not is_scorable(node_completions, answer):
+                plan.append(None)
+                continue
+
+            node_plan = []
+            answer_key, meta_key = _content_key(answer), _content_key(meta)
+            for completion in node_completions:
+                prediction = extract_answer(completion)
+                key = (_content_key(prediction), answer_key, meta_key)
+                if key not in unique:
+                    unique[key] = len(unique_items)
+                    unique_items.append((prediction, answer, meta))
+                node_plan.append(unique[key])
+            plan.append(node_plan)
+
+        scores = self._score_unique(unique_items)
+
+        rewards = []
+        for node_completions, answer, meta, node_plan in zip(
+            completions, answers, metadata, plan
+        ):
+            correctness = (
+                None if node_plan is None else [scores[idx] for idx in node_plan]
+            )
+            rewards.append(
+                self.reward_fn(
+                    node_completions,
+                    answer,
+                    meta,
+                    include_formatting=include_formatting,
+                    correctness=correctness,
+                )
+            )
+        return rewards
+
+    def score_view(
+        self, view: StageView, include_formatting: bool = False
+    ) -> Dict[Any, Dict[Any, List[List[float]]]]:
+        """Score a StageView, returning rewards[agent][batch_id][node]."""
+        rewards = self.score_nodes(
+            view.completions, view.answers, view.metadata, include_formatting
+        )
+        return view.to_nested(rewards)
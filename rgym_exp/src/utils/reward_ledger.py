@@ -0,0 +1,78 @@
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+class RewardLedger:
+    """Running per-agent reward totals for the current round.
+
+    Each stage's rewards ([Agent][Batch Item][Node Idx][Generation]) are
+    folded in once as they arrive. Totals live in a NumPy array indexed
+    through an agent-id table, so total, max-agent and per-agent lookups do
+    not rescan earlier stages.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._index: Dict[Hashable, int] = {}
+        self._agents: List[Hashable] = []
+        self._totals = np.zeros(capacity, dtype=np.float64)
+        self._stages: set = set()
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def _agent_index(self, agent: Hashable) -> int:
+        idx = self._index.get(agent)
+        if idx is None:
+            idx = len(self._agents)
+            if idx == len(self._totals):
+                self._totals = np.concatenate(
+                    [self._totals, np.zeros_like(self._totals)]
+                )
+            self._index[agent] = idx
+            self._agents.append(agent)
+        return idx
+
+    def has_stage(self, stage: int) -> bool:
+        return stage in self._stages
+
+    def add_stage(self, stage: int, rewards: Dict[Any, Dict[Any, List[Any]]]):
+        """Fold one stage of rewards into the totals (ignored if already added)."""
+        if stage in self._stages:
+            return
+        self._stages.add(stage)
+
+        indices, totals = [], []
+        for agent, agent_rewards in rewards.items():
+            indices.append(self._agent_index(agent))
+            totals.append(
+                sum(
+                    sum(generation_rewards)
+                    for batch_rewards in agent_rewards.values()
+                    for generation_rewards in batch_rewards
+                )
+            )
+        if indices:
+            np.add.at(self._totals, np.asarray(indices), np.asarray(totals))
+
+    def total(self, agent: Hashable) -> float:
+        idx = self._index.get(agent)
+        return 0.0 if idx is None else float(self._totals[idx])
+
+    def max_agent(self) -> Optional[Tuple[Hashable, float]]:
+        if not self._agents:
+            return None
+        idx = int(np.argmax(self._totals[: len(self._agents)]))
+        return self._agents[idx], float(self._totals[idx])
+
+    def by_agent(self) -> Dict[Hashable, float]:
+        return {
+            agent: float(total)
+            for agent, total in zip(self._agents, self._totals[: len(self._agents)])
+        }
+
+    def reset(self):
+        self._index.clear()
+        self._agents.clear()
+        self._totals[:] = 0.0
+        self._stages.clear()
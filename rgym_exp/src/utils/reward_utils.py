@@ -1,10 +1,26 @@
-import re
-from typing import Any, Dict, List, Optional
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from genrl.state import GameState
 from reasoning_gym.factory import get_score_answer_fn
 from reasoning_gym.utils import compute_decimal_reward, extract_answer
 
+# Views of the most recent stages, keyed by (round, stage), shared by the
+# reward and logging paths.
+_STAGE_VIEW_CACHE_SIZE = 4
+_stage_view_cache: "OrderedDict[Tuple[int, int], Tuple[weakref.ref, StageView]]" = (
+    OrderedDict()
+)
+
+
+@lru_cache(maxsize=None)
+def get_scorer(source_dataset: str) -> Callable[[str, Dict[str, Any]], float]:
+    """Resolve (and memoize) the reasoning_gym scoring function for a dataset."""
+    return get_score_answer_fn(source_dataset)
+
 
 def score_answer(
     predicted_answer: str, oracle_answer: str, metadata: Optional[Dict[str, Any]] = None
@@ -13,19 +29,41 @@ def score_answer(
     if metadata and "source_dataset" in metadata:
         # Try to get the original dataset for scoring
         source_dataset = metadata["source_dataset"]
-        scorer = get_score_answer_fn(source_dataset)
+        scorer = get_scorer(source_dataset)
         entry = {"answer": oracle_answer, "metadata": metadata}
         return scorer(predicted_answer, entry)
     # Default to decimal reward computation from reasoning_gym.utils
     return compute_decimal_reward(predicted_answer, oracle_answer)
 
 
+def is_well_formatted(completion: str) -> bool:
+    """Linear-time equivalent of matching the completion against
+    ``^<think>((?:(?!</?think>).)*)</think>\\n<answer>(.*?)</answer>$``.
+
+    The think block ends at the first ``</think>`` and may not contain
+    ``<think>``; the rest must be ``\\n<answer>`` followed by anything that
+    ends in ``</answer>`` (``$`` also allows a single trailing newline).
+    """
+    if not completion.startswith("<think>"):
+        return False
+    think_end = completion.find("</think>", 7)
+    if think_end < 0 or completion.find("<think>", 7, think_end) >= 0:
+        return False
+    if not completion.startswith("\n<answer>", think_end + 8):
+        return False
+    answer = completion[think_end + 17 :]
+    return answer.endswith("</answer>") or answer.endswith("</answer>\n")
+
+
 def format_reward(completions, weight=1.0):
-    regex = r"^<think>([^<]*(?:<(?!/?think>)[^<]*)*)<\/think>\n<answer>([\s\S]*?)<\/answer>$"
-    matches = [
-        re.match(regex, completion, flags=re.DOTALL) for completion in completions
+    return [
+        weight if is_well_formatted(completion) else 0.0 for completion in completions
     ]
-    return [weight if match else 0.0 for match in matches]
+
+
+def is_scorable(completions, answer) -> bool:
+    """Whether a node has completions and an answer to score them against."""
+    return bool(completions) and isinstance(completions, list) and bool(answer)
 
 
 def accuracy_reward(completions, ground_truth, metadata, weight=1.0):
@@ -36,62 +74,66 @@ def accuracy_reward(completions, ground_truth, metadata, weight=1.0):
     ]
 
 
-def get_completions(
-    game_state: GameState, stage: int
-) -> Dict[Any, Dict[Any, List[Any]]]:
-    # Get completions per agent and batch item from corresponding set of actions
+@dataclass
+class StageView:
+    """Columnar view of a single game stage.
+
+    Entry ``i`` of each column belongs to the node at ``index[i]``, an
+    ``(agent, batch_id, node_idx)`` tuple.
+    """
+
+    round: int
+    stage: int
+    completions: List[Any] = field(default_factory=list)
+    answers: List[Any] = field(default_factory=list)
+    metadata: List[Any] = field(default_factory=list)
+    index: List[Tuple[Any, Any, int]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def to_nested(self, values: List[Any]) -> Dict[Any, Dict[Any, List[Any]]]:
+        """Regroup a column (or any per-node list) as [Agent][Batch Item][Node Idx]."""
+        nested = {}
+        for (agent, batch_id, _), value in zip(self.index, values):
+            nested.setdefault(agent, {}).setdefault(batch_id, []).append(value)
+        return nested
+
+
+def build_stage_view(game_state: GameState, stage: int) -> StageView:
+    """Extract completions, answers and metadata for a stage in one traversal."""
     actions = game_state.get_stage_actions(stage)
-    completions = {}  # Key per agent
-    for agent in actions:
-        completions[agent] = {}  # Will store a list per batch item
-        for batch_id in actions[agent]:
-            completions[agent][
-                batch_id
-            ] = (
-                []
-            )  # Will store all completion strings for this batch item for this agent
-            for node, _ in enumerate(actions[agent][batch_id]):
-                completions[agent][batch_id].append(actions[agent][batch_id][node])
-    return completions  # Indices are [Agent][Batch Item][Node Idx][Completion]
-
-
-def get_answers(game_state: GameState, stage: int) -> Dict[Any, Dict[Any, List[Any]]]:
-    # Get answers per agent and batch item from corresponding set of world-states
     world_states = game_state.get_stage_state(stage)
-    answers = {}  # Key per agent
-    for agent in world_states:
-        answers[agent] = (
-            {}
-        )  # Will store an answer (or list of valid choices) per batch item
-        for batch_id in world_states[agent]:
-            answers[agent][batch_id] = []
-            for node, _ in enumerate(world_states[agent][batch_id]):
-                answers[agent][batch_id].append(
-                    world_states[agent][batch_id][node].environment_states["answer"]
-                )
-    return answers  # Indices are [Agent][Batch Item][Node Idx]
-
-
-def get_metadata(game_state: GameState, stage: int) -> Dict[Any, Dict[Any, List[Any]]]:
-    # Get metadata per agent and batch item from corresponding set of world-states
-    world_states = game_state.get_stage_state(stage)
-    metadata = {}  # Key per agent
-    for agent in world_states:
-        metadata[agent] = (
-            {}
-        )  # Will store an answer (or list of valid choices) per batch item
-        for batch_id in world_states[agent]:
-            metadata[agent][batch_id] = []
-            for node, _ in enumerate(world_states[agent][batch_id]):
-                metadata[agent][batch_id].append(
-                    world_states[agent][batch_id][node].environment_states["metadata"]
-                )
-    return metadata  # Indices are [Agent][Batch Item][Node Idx]
+    view = StageView(round=game_state.round, stage=stage)
+    for agent, agent_actions in actions.items():
+        agent_states = world_states[agent]
+        for batch_id, batch_actions in agent_actions.items():
+            batch_states = agent_states[batch_id]
+            for node, node_actions in enumerate(batch_actions):
+                environment_states = batch_states[node].environment_states
+                view.completions.append(node_actions)
+                view.answers.append(environment_states["answer"])
+                view.metadata.append(environment_states["metadata"])
+                view.index.append((agent, batch_id, node))
+
+    _stage_view_cache[(game_state.round, stage)] = (weakref.ref(game_state), view)
+    while len(_stage_view_cache) > _STAGE_VIEW_CACHE_SIZE:
+        _stage_view_cache.popitem(last=False)
+    return view
+
+
+def get_stage_view(game_state: GameState, stage: int) -> StageView:
+    """Return the view built for this stage of the round, building it if needed."""
+    cached = _stage_view_cache.get((game_state.round, stage))
+    if cached is not None and cached[0]() is game_state:
+        return cached[1]
+    return build_stage_view(game_state, stage)
 
 
 def parse_game_state(game_state, stage):
+    view = get_stage_view(game_state, stage)
     return (
-        get_completions(game_state, stage),
-        get_answers(game_state, stage),
-        get_metadata(game_state, stage),
+        view.to_nested(view.completions),
+        view.to_nested(view.answers),
+        view.to_nested(view.metadata),
     )
@@ -0,0 +1,159 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+PROMETHEUS_PREFIX = "rl_swarm"
+
+
+class RoundMetrics:
+    """Per-round hot-path timings and throughput for one swarm node.
+
+    Durations are accumulated in seconds under a metric name, either with
+    ``timed`` or by wrapping an object's method in place with ``wrap``. At the
+    end of each round ``flush`` appends one JSON line to ``jsonl_path`` and
+    rewrites ``prom_path`` in Prometheus text format with the latest values,
+    so node_exporter's textfile collector can pick it up.
+    """
+
+    def __init__(self, jsonl_path: str, prom_path: Optional[str] = None, labels=None):
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.labels = dict(labels or {})
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = {}
+        self._round_start = time.monotonic()
+        self._last_chain_latency: Optional[float] = None
+        self._tracked: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def add(self, name: str, value: float):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0.0) + value
+
+    @contextmanager
+    def timed(self, name: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - start)
+
+    def wrap(self, obj: Any, method: str, name: str, on_result=None):
+        """Time every call of ``obj.method`` under ``name``.
+
+        ``on_result(args, kwargs, result)`` may return extra counters to add.
+        Missing methods are ignored so optional hook points stay optional.
+        """
+        original = getattr(obj, method, None)
+        if original is None:
+            return
+
+        @functools.wraps(original)
+        def timed_method(*args, **kwargs):
+            start = time.monotonic()
+            result = original(*args, **kwargs)
+            self.add(name, time.monotonic() - start)
+            if on_result is not None:
+                for counter, value in (on_result(args, kwargs, result) or {}).items():
+                    self.add(counter, value)
+            return result
+
+        setattr(obj, method, timed_method)
+
+    def track(self, prefix: str, stats_fn: Callable[[], Dict[str, float]]):
+        """Report ``stats_fn()`` as ``<prefix>_<name>`` gauges at every flush."""
+        with self._lock:
+            self._tracked[prefix] = stats_fn
+
+    def on_chain_submitted(self, round_num: int, latency: float):
+        """ChainSubmissionQueue callback; may run on the queue's thread."""
+        with self._lock:
+            self._last_chain_latency = latency
+            self._values["chain_submit_s"] = (
+                self._values.get("chain_submit_s", 0.0) + latency
+            )
+            self._values["chain_submits"] = self._values.get("chain_submits", 0.0) + 1
+
+    def flush(self, round_num: int, **extra: float) -> Dict[str, float]:
+        now = time.monotonic()
+        with self._lock:
+            values, self._values = self._values, {}
+            round_s = now - self._round_start
+            self._round_start = now
+            last_chain_latency = self._last_chain_latency
+            tracked = list(self._tracked.items())
+
+        for prefix, stats_fn in tracked:
+            for name, value in stats_fn().items():
+                values[f"{prefix}_{name}"] = value
+        values.update(extra)
+        values["round_s"] = round_s
+        if values.get("model_generate_s"):
+            values["tokens_per_s"] = (
+                values.get("generated_tokens", 0.0) / values["model_generate_s"]
+            )
+        if round_s > 0:
+            values["samples_per_s"] = values.get("generated_samples", 0.0) / round_s
+        if last_chain_latency is not None:
+            values["last_chain_submit_latency_s"] = last_chain_latency
+
+        record = {"round": round_num, "time": time.time()} | self.labels
+        record |= {k: round(v, 6) for k, v in sorted(values.items())}
+        with open(self.jsonl_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        if self.prom_path is not None:
+            self._write_prometheus(round_num, values)
+        return values
+
+    def _write_prometheus(self, round_num: int, values: Dict[str, float]):
+        labels = ",".join(f'{k}="{v}"' for k, v in sorted(self.labels.items()))
+        labels = f"{{{labels}}}" if labels else ""
+        lines = [f"{PROMETHEUS_PREFIX}_round{labels} {round_num}"]
+        for name, value in sorted(values.items()):
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}{labels} {value:.6g}")
+        tmp_path = f"{self.prom_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prom_path)
+
+
+def count_generated(eos_token_id=None, pad_token_id: Optional[int] = None):
+    """``on_result`` for ``model.generate``: counts new tokens and rows.
+
+    Rows that finish early are padded, usually with EOS itself, so each row
+    counts its tokens up to and including its first EOS (``eos_token_id`` may
+    be a list). Without an EOS id, tokens equal to ``pad_token_id`` are
+    skipped instead.
+    """
+    if eos_token_id is None:
+        eos_ids = []
+    elif isinstance(eos_token_id, int):
+        eos_ids = [eos_token_id]
+    else:
+        eos_ids = list(eos_token_id)
+
+    def on_result(args, kwargs, result):
+        input_ids = kwargs.get("input_ids", args[0] if args else None)
+        sequences = getattr(result, "sequences", result)
+        if input_ids is None or not hasattr(sequences, "shape"):
+            return {}
+        new_tokens = sequences[:, input_ids.shape[-1] :]
+        if eos_ids:
+            is_eos = new_tokens == eos_ids[0]
+            for eos_id in eos_ids[1:]:
+                is_eos |= new_tokens == eos_id
+            # Tokens with no EOS before them: the text plus the first EOS.
+            generated = int(((is_eos.cumsum(-1) - is_eos.long()) == 0).sum())
+        elif pad_token_id is not None:
+            generated = int((new_tokens != pad_token_id).sum())
+        else:
+            generated = new_tokens.numel()
+        return {
+            "generated_tokens": generated,
+            "generated_samples": sequences.shape[0],
+        }
+
+    return on_result
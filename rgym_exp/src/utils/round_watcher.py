@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from genrl.blockchain import SwarmCoordinator
+from genrl.logging_utils.global_defs import get_logger
+from hivemind.dht import DHT
+
+
+class RoundStageWatcher:
+    """Tracks the swarm's round and stage from a single background thread.
+
+    The chain coordinator is the authority. It is polled only while callers
+    are blocked in ``wait_for``, backing off with jitter while the round is
+    unchanged; with nobody waiting the thread sleeps until a new waiter
+    arrives.
+    """
+
+    def __init__(
+        self,
+        coordinator: SwarmCoordinator,
+        dht: Optional[DHT] = None,
+        check_interval: float = 5.0,
+        max_check_interval: float = 60.0,
+        jitter: float = 0.2,
+    ):
+        self.coordinator = coordinator
+        self.dht = dht
+        self.check_interval = check_interval
+        self.max_check_interval = max_check_interval
+        self.jitter = jitter
+
+        self._cond = threading.Condition()
+        self._round_stage: Optional[Tuple[int, int]] = None
+        self._waiters = 0
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="round-stage-watcher", daemon=True
+        )
+
+    def start(self, initial: Optional[Tuple[int, int]] = None):
+        if initial is not None:
+            self._round_stage = initial
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def current(self) -> Optional[Tuple[int, int]]:
+        with self._cond:
+            return self._round_stage
+
+    def _update(self, round_stage: Tuple[int, int]) -> bool:
+        with self._cond:
+            changed = round_stage != self._round_stage
+            self._round_stage = round_stage
+            if changed:
+                self._cond.notify_all()
+            return changed
+
+    def _run(self):
+        interval = self.check_interval
+        fail_log_time = 0.0
+        while True:
+            with self._cond:
+                while self._waiters == 0 and not self._stopped:
+                    # Nobody needs the round; sleep until wait_for is called.
+                    interval = self.check_interval
+                    self._cond.wait()
+                if self._stopped:
+                    return
+
+            if self.dht is not None:
+                try:
+                    _ = self.dht.get_visible_maddrs(latest=True)
+                except Exception:
+                    pass
+
+            now = time.monotonic()
+            try:
+                round_stage = tuple(self.coordinator.get_round_and_stage())
+            except Exception as e:
+                if now - fail_log_time > 10.0:
+                    get_logger().debug(
+                        f"Could not fetch round and stage: {e}. Next check in {interval:.1f}s."
+                    )
+                    fail_log_time = now
+                interval = min(interval * 2, self.max_check_interval)
+            else:
+                if self._update(round_stage):
+                    interval = self.check_interval
+                else:
+                    interval = min(interval * 1.5, self.max_check_interval)
+
+            sleep_for = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            with self._cond:
+                if not self._stopped and self._waiters > 0:
+                    self._cond.wait(timeout=sleep_for)
+
+    def wait_for(
+        self, predicate: Callable[[int, int], bool], timeout: float
+    ) -> Optional[Tuple[int, int]]:
+        """Block until predicate(round, stage) holds, or return None on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._waiters += 1
+            self._cond.notify_all()
+            try:
+                while True:
+                    if self._round_stage is not None and predicate(
+                        *self._round_stage
+                    ):
+                        return self._round_stage
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._stopped:
+                        return None
+                    self._cond.wait(timeout=remaining)
+            finally:
+                self._waiters -= 1
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import pickle
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from genrl.logging_utils.global_defs import get_logger
+
+
+class SampleCache:
+    """On-disk cache of generated samples, one Arrow IPC file per chunk.
+
+    Files are memory-mapped on read, so cached chunks are streamed from the
+    page cache rather than loaded into Python objects up front. Answers and
+    metadata are pickled to preserve their types exactly.
+    """
+
+    def __init__(self, cache_dir: str, key: str):
+        self.path = os.path.join(cache_dir, key)
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def make_key(yaml_config_path: str, seed: Optional[int], chunk_size: int) -> str:
+        digest = hashlib.sha256()
+        with open(yaml_config_path, "rb") as f:
+            digest.update(f.read())
+        digest.update(f"|seed={seed}|chunk_size={chunk_size}".encode())
+        return digest.hexdigest()[:16]
+
+    def _chunk_path(self, chunk_num: int) -> str:
+        return os.path.join(self.path, f"chunk_{chunk_num:06d}.arrow")
+
+    def num_chunks(self) -> int:
+        """Number of consecutive chunks available from chunk 0."""
+        n = 0
+        while os.path.exists(self._chunk_path(n)):
+            n += 1
+        return n
+
+    def read_chunk(self, chunk_num: int):
+        import pyarrow as pa
+
+        source = pa.memory_map(self._chunk_path(chunk_num), "r")
+        return pa.ipc.open_file(source).read_all()
+
+    def write_chunk(self, chunk_num: int, rows: Dict[str, List[Any]]):
+        import pyarrow as pa
+
+        table = pa.table(
+            {
+                "question": pa.array(rows["question"], type=pa.string()),
+                "answer": pa.array(rows["answer"], type=pa.binary()),
+                "metadata": pa.array(rows["metadata"], type=pa.binary()),
+            }
+        )
+        path = self._chunk_path(chunk_num)
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+
+def reseeded_chunk(dataset, chunk_num: int, chunk_size: int):
+    """Build chunk ``chunk_num`` of a dataset the way ReseedingDataset does:
+    the same dataset class, re-configured with ``seed + chunk_num`` and
+    ``size=chunk_size``. Only the public config and constructor are used.
+    """
+    seed = dataset.config.seed
+    config = replace(
+        dataset.config,
+        seed=None if seed is None else seed + chunk_num,
+        size=chunk_size,
+    )
+    return type(dataset)(config=config)
+
+
+class CachedSampleStream:
+    """Infinite, reseeding sample stream backed by a SampleCache.
+
+    Produces the same samples as ReseedingDataset over ``dataset``. Cached
+    chunks are replayed first; generation then resumes at the first uncached
+    position by building that chunk directly, so nothing is regenerated to
+    get there. The chunk being filled is rewritten every ``flush_every``
+    samples, so a restart loses at most that many samples of progress.
+    """
+
+    def __init__(
+        self,
+        dataset,
+        cache: SampleCache,
+        chunk_size: int,
+        flush_every: int = 16,
+    ):
+        self.dataset = dataset
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self.flush_every = max(1, flush_every)
+        # Chunks replayed from disk; fixed at start, since chunks written by
+        # this stream are already in _pending.
+        self.cached_chunks = cache.num_chunks()
+        self._position = 0  # Global index of the next sample.
+        self._table = None
+        self._table_chunk = -1
+        self._chunk = None
+        self._chunk_num = -1
+        self._pending = {"question": [], "answer": [], "metadata": []}
+        if self.cached_chunks:
+            get_logger().info(
+                f"Replaying {self.cached_chunks} cached sample chunks from {cache.path}"
+            )
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        chunk_num, row = divmod(self._position, self.chunk_size)
+        if chunk_num < self.cached_chunks:
+            item = self._next_cached(chunk_num, row)
+            if item is not None:
+                self._position += 1
+                return item
+        item = self._next_generated(chunk_num, row)
+        self._position += 1
+        return item
+
+    def _next_cached(self, chunk_num: int, row: int) -> Optional[Dict[str, Any]]:
+        if self._table_chunk != chunk_num:
+            self._table = self.cache.read_chunk(chunk_num)
+            self._table_chunk = chunk_num
+        if row >= self._table.num_rows:
+            # A partially filled chunk: keep its rows so they are rewritten
+            # along with the samples generated after them, and stop replaying
+            # so those rows are loaded only once.
+            self._pending = {
+                name: self._table.column(name).to_pylist()
+                for name in ("question", "answer", "metadata")
+            }
+            self._table = None
+            self._table_chunk = -1
+            self.cached_chunks = chunk_num
+            return None
+        return {
+            "question": self._table.column("question")[row].as_py(),
+            "answer": pickle.loads(self._table.column("answer")[row].as_py()),
+            "metadata": pickle.loads(self._table.column("metadata")[row].as_py()),
+        }
+
+    def _next_generated(self, chunk_num: int, row: int) -> Dict[str, Any]:
+        if self._chunk_num != chunk_num:
+            self._chunk = reseeded_chunk(self.dataset, chunk_num, self.chunk_size)
+            self._chunk_num = chunk_num
+        item = self._chunk[row]
+        self._pending["question"].append(item["question"])
+        self._pending["answer"].append(pickle.dumps(item["answer"]))
+        self._pending["metadata"].append(pickle.dumps(item.get("metadata", {})))
+
+        chunk_full = row + 1 == self.chunk_size
+        if chunk_full or len(self._pending["question"]) % self.flush_every == 0:
+            try:
+                self.cache.write_chunk(chunk_num, self._pending)
+            except Exception as e:
+                get_logger().debug(f"Failed to write sample cache chunk: {e}")
+        if chunk_full:
+            self._pending = {"question": [], "answer": [], "metadata": []}
+        return item
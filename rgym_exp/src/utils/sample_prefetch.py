@@ -0,0 +1,83 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+class _ProducerError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class SamplePrefetcher:
+    """Pulls samples from an iterator on a daemon thread.
+
+    Up to ``depth`` samples, already passed through ``wrap_fn``, are kept ready
+    in a bounded queue so that slow generators run while the training thread is
+    busy elsewhere. Errors raised by the source are re-raised on the consumer
+    side in order.
+    """
+
+    def __init__(
+        self,
+        source: Iterator[Any],
+        depth: int,
+        wrap_fn: Optional[Callable[[Any], Any]] = None,
+        poll_interval: float = 0.5,
+    ):
+        assert depth > 0
+        self.source = source
+        self.wrap_fn = wrap_fn
+        self.poll_interval = poll_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._failure: Optional[_ProducerError] = None
+        self._thread = threading.Thread(
+            target=self._produce, name="rg-sample-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    def _produce(self):
+        while not self._stop.is_set():
+            try:
+                item = next(self.source)
+                if self.wrap_fn is not None:
+                    item = self.wrap_fn(item)
+            except BaseException as e:
+                item = _ProducerError(e)
+
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=self.poll_interval)
+                    break
+                except queue.Full:
+                    continue
+
+            if isinstance(item, _ProducerError):
+                return
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Any:
+        if self._failure is not None:
+            raise self._failure.error
+        item = self._queue.get()
+        if isinstance(item, _ProducerError):
+            self._failure = item
+            raise item.error
+        return item
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=self.poll_interval * 2)
+
+
+def wrap_reasoning_gym_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a reasoning_gym item into question/answer/dict metadata."""
+    metadata = item.get("metadata", {})
+    if not isinstance(metadata, dict):
+        metadata = {"original_metadata": metadata}
+    return {"question": item["question"], "answer": item["answer"], "metadata": metadata}
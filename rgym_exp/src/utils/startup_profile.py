@@ -0,0 +1,157 @@
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+PROFILE_ENV_VAR = "RL_SWARM_PROFILE_STARTUP"
+
+
+class StartupTimeline:
+    """Records (possibly nested) wall-clock phases of node startup, from any thread.
+
+    Each phase keeps its stack of enclosing phases on the same thread, so the
+    timeline can also be written as collapsed stacks for flamegraph tools.
+    """
+
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.phases: List[Dict[str, Any]] = []
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def phase(self, name: str):
+        stack = self._stack()
+        frame = [name, 0.0]  # name, time spent in child phases
+        stack.append(frame)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            stack.pop()
+            if stack:
+                stack[-1][1] += end - start
+            thread = threading.current_thread().name
+            with self._lock:
+                self.phases.append(
+                    {
+                        "name": name,
+                        "thread": thread,
+                        "stack": ";".join([thread] + [f[0] for f in stack] + [name]),
+                        "depth": len(stack),
+                        "start_s": round(start - self.t0, 4),
+                        "duration_s": round(end - start, 4),
+                        "self_s": round(end - start - frame[1], 4),
+                    }
+                )
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.t0
+
+    def _top_level(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            phases = [p for p in self.phases if p["depth"] == 0]
+        return sorted(phases, key=lambda p: p["start_s"])
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{p['name']}={p['duration_s']:.1f}s" for p in self._top_level()
+        )
+
+    def write_readiness(self, path: str, **extra: Any):
+        """Atomically write a readiness file that watchdogs can poll for."""
+        payload = {
+            "pid": os.getpid(),
+            "ready_at": time.time(),
+            "startup_s": round(self.elapsed(), 3),
+            "phases": self._top_level(),
+        } | extra
+        _write_json(path, payload)
+
+    def write_report(self, log_dir: str, prefix: str = "startup_profile"):
+        """Write every phase as JSON plus a collapsed-stack (.folded) file.
+
+        Folded lines carry self time in milliseconds, the input format of
+        flamegraph.pl and speedscope.
+        """
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p["start_s"])
+        _write_json(
+            os.path.join(log_dir, f"{prefix}.json"),
+            {"startup_s": round(self.elapsed(), 3), "phases": phases},
+        )
+        folded: Dict[str, float] = {}
+        for p in phases:
+            folded[p["stack"]] = folded.get(p["stack"], 0.0) + p["self_s"]
+        with open(os.path.join(log_dir, f"{prefix}.folded"), "w") as f:
+            for stack, seconds in folded.items():
+                f.write(f"{stack} {max(1, round(seconds * 1000))}\n")
+
+
+def _write_json(path: str, payload: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+_active: Optional[StartupTimeline] = None
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV_VAR, "0") == "1"
+
+
+def set_active_timeline(timeline: Optional[StartupTimeline]):
+    global _active
+    _active = timeline
+
+
+@contextmanager
+def startup_phase(name: str):
+    """Record a phase on the active timeline, if the launcher set one."""
+    if _active is None:
+        yield
+    else:
+        with _active.phase(name):
+            yield
+
+
+def install_import_timer(timeline: StartupTimeline):
+    """Time each first import of an absolute module as an ``import:`` phase."""
+    original_import = builtins.__import__
+
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return original_import(name, globals, locals, fromlist, level)
+        with timeline.phase(f"import:{name}"):
+            return original_import(name, globals, locals, fromlist, level)
+
+    builtins.__import__ = timed_import
+    return lambda: setattr(builtins, "__import__", original_import)
+
+
+def install_instantiate_timer(timeline: StartupTimeline):
+    """Time every hydra ``_target_`` call as an ``instantiate:`` phase."""
+    from hydra._internal.instantiate import _instantiate2
+
+    original_call = _instantiate2._call_target
+
+    def timed_call(_target_, *args, **kwargs):
+        name = getattr(_target_, "__qualname__", None) or str(_target_)
+        module = getattr(_target_, "__module__", None)
+        with timeline.phase(f"instantiate:{module}.{name}" if module else name):
+            return original_call(_target_, *args, **kwargs)
+
+    _instantiate2._call_target = timed_call
+    return lambda: setattr(_instantiate2, "_call_target", original_call)
@@ -0,0 +1,233 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from genrl.blockchain import SwarmCoordinator
+from genrl.logging_utils.global_defs import get_logger
+
+
+def is_permanent_error(e: Exception) -> bool:
+    """Errors a retry cannot fix: reverts, bad arguments and HTTP 4xx (bar 429)."""
+    if isinstance(e, TypeError) or "revert" in str(e).lower():
+        return True
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    return status is not None and 400 <= status < 500 and status != 429
+
+
+class ChainSubmissionQueue:
+    """Submits rewards and winners to the coordinator on a background thread.
+
+    Pending submissions are coalesced per round (rewards are summed, the
+    latest winners win) and journaled to ``journal_path`` so they survive
+    restarts. Each round keeps its own jittered exponential backoff, so a
+    round that keeps failing never holds up newer ones; it is dropped after
+    ``max_attempts`` failures, or at once on an error a retry cannot fix.
+    Callers never block on the chain.
+    """
+
+    def __init__(
+        self,
+        coordinator: SwarmCoordinator,
+        peer_id: str,
+        journal_path: str,
+        initial_backoff: float = 5.0,
+        max_backoff: float = 60.0 * 10,
+        max_attempts: int = 8,
+        on_submitted: Optional[Callable[[int, float], None]] = None,
+    ):
+        self.coordinator = coordinator
+        self.peer_id = peer_id
+        self.journal_path = journal_path
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.on_submitted = on_submitted  # Called with (round, latency seconds).
+
+        self._cond = threading.Condition()
+        self._rewards: Dict[int, int] = {}
+        self._winners: Dict[int, List[str]] = {}
+        self._attempts: Dict[int, int] = {}  # Failed attempts per round.
+        self._retry_at: Dict[int, float] = {}  # Monotonic time of next attempt.
+        self._in_flight = False
+        self._closed = False
+        self._load_journal()
+
+        self._thread = threading.Thread(
+            target=self._run, name="chain-submission", daemon=True
+        )
+        self._thread.start()
+
+    def _load_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, "r") as f:
+                journal = json.load(f)
+        except (OSError, ValueError) as e:
+            get_logger().debug(f"Ignoring unreadable submission journal: {e}")
+            return
+        if journal.get("peer_id") != self.peer_id:
+            return
+        self._rewards = {int(r): v for r, v in journal.get("rewards", {}).items()}
+        self._winners = {int(r): v for r, v in journal.get("winners", {}).items()}
+        self._attempts = {int(r): v for r, v in journal.get("attempts", {}).items()}
+        if self._rewards or self._winners:
+            get_logger().info(
+                f"Resuming {len(set(self._rewards) | set(self._winners))} pending chain submissions."
+            )
+
+    def _write_journal(self):
+        journal = {
+            "peer_id": self.peer_id,
+            "rewards": self._rewards,
+            "winners": self._winners,
+            "attempts": self._attempts,
+        }
+        tmp_path = f"{self.journal_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(journal, f)
+            os.replace(tmp_path, self.journal_path)
+        except OSError as e:
+            get_logger().debug(f"Failed to write submission journal: {e}")
+
+    def submit(self, round_num: int, reward: int, winners: List[str]):
+        """Queue a reward and winners for ``round_num``; returns immediately."""
+        with self._cond:
+            was_idle = not (self._rewards or self._winners)
+            self._rewards[round_num] = self._rewards.get(round_num, 0) + reward
+            self._winners[round_num] = list(winners)
+            self._write_journal()
+            if was_idle:
+                # Only wake an idle worker; one that is backing off keeps its
+                # schedule and picks this round up when it next wakes.
+                self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(set(self._rewards) | set(self._winners))
+
+    def _submit_round(self, round_num: int):
+        # Each half is dropped from the journal as soon as it lands so a
+        # retry never resubmits it.
+        with self._cond:
+            reward = self._rewards.get(round_num)
+        if reward is not None:
+            self.coordinator.submit_reward(round_num, 0, reward, self.peer_id)
+            with self._cond:
+                if self._rewards.get(round_num) == reward:
+                    del self._rewards[round_num]
+                else:  # More reward was coalesced while we were submitting.
+                    self._rewards[round_num] -= reward
+                self._write_journal()
+
+        with self._cond:
+            winners = self._winners.get(round_num)
+        if winners is not None:
+            self.coordinator.submit_winners(round_num, winners, self.peer_id)
+            with self._cond:
+                if self._winners.get(round_num) == winners:
+                    del self._winners[round_num]
+                self._write_journal()
+
+    def _pending_rounds(self):
+        return set(self._rewards) | set(self._winners)
+
+    def _drop_round(self, round_num: int):
+        self._rewards.pop(round_num, None)
+        self._winners.pop(round_num, None)
+        self._attempts.pop(round_num, None)
+        self._retry_at.pop(round_num, None)
+        self._write_journal()
+
+    def _next_round(self) -> Optional[int]:
+        """Wait for the oldest round that is due; None once closed and drained."""
+        while True:
+            rounds = self._pending_rounds()
+            if not rounds:
+                if self._closed:
+                    return None
+                self._cond.wait()
+                continue
+            now = time.monotonic()
+            due = [r for r in rounds if self._retry_at.get(r, 0.0) <= now]
+            if due:
+                return min(due)
+            if self._closed:
+                return None
+            self._cond.wait(timeout=min(self._retry_at[r] for r in rounds) - now)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                round_num = self._next_round()
+                if round_num is None:
+                    return
+                self._in_flight = True
+
+            start = time.monotonic()
+            try:
+                self._submit_round(round_num)
+            except Exception as e:
+                with self._cond:
+                    attempts = self._attempts.get(round_num, 0) + 1
+                    self._attempts[round_num] = attempts
+                    if is_permanent_error(e) or attempts >= self.max_attempts:
+                        get_logger().warning(
+                            f"Giving up on chain submission for round {round_num} "
+                            f"after {attempts} attempt(s): {e}"
+                        )
+                        self._drop_round(round_num)
+                    else:
+                        backoff = min(
+                            self.initial_backoff * 2 ** (attempts - 1), self.max_backoff
+                        )
+                        self._retry_at[round_num] = time.monotonic() + backoff * (
+                            random.uniform(0.8, 1.2)
+                        )
+                        self._write_journal()
+                        if attempts == 1:
+                            get_logger().exception(
+                                "Failed to submit to chain.\n"
+                                "This is most likely transient and will recover.\n"
+                                "There is no need to kill the program.\n"
+                                "If you encounter this error, please report it to Gensyn by\n"
+                                "filing a github issue here: https://github.com/gensyn-ai/rl-swarm/issues/ \n"
+                                "including the full stacktrace."
+                            )
+                        else:
+                            get_logger().debug(
+                                f"Chain submission for round {round_num} failed "
+                                f"{attempts} times. Next attempt in {backoff:.0f}s."
+                            )
+                    self._in_flight = False
+                    self._cond.notify_all()
+                continue
+
+            if self.on_submitted is not None:
+                self.on_submitted(round_num, time.monotonic() - start)
+            with self._cond:
+                if round_num not in self._pending_rounds():
+                    self._attempts.pop(round_num, None)
+                    self._retry_at.pop(round_num, None)
+                self._in_flight = False
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Wait up to ``timeout`` seconds for pending submissions to land."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._rewards or self._winners or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+        return True
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,77 @@
+"""A local stand-in for the swarm judge's HTTP API, for tests and benchmarks."""
+
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeJudge:
+    """Serves /request-question/ and /submit-answer/ on localhost.
+
+    ``latency`` delays every response, ``fail_next`` answers the next n
+    requests with HTTP ``fail_status`` (503 by default). Every request is recorded in ``requests`` as
+    ``(path, payload)``.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.fail_next = 0
+        self.fail_status = 503
+        self.requests = []
+        self._lock = threading.Lock()
+        self._session_ids = itertools.count()
+        judge = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                status, body = judge._handle(self.path, payload)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def _handle(self, path: str, payload):
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests.append((path, payload))
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return self.fail_status, {"detail": "unavailable"}
+        if path == "/request-question/":
+            session_id = next(self._session_ids)
+            return 200, {
+                "session_id": f"s{session_id}",
+                "question": f"question {session_id} for round {payload['round_number']}",
+            }
+        if path == "/submit-answer/":
+            return 200, {"score": 1.0}
+        return 404, {"detail": "not found"}
+
+    def paths(self):
+        with self._lock:
+            return [path for path, _ in self.requests]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
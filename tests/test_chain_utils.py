@@ -0,0 +1,132 @@
+import pytest
+
+pytest.importorskip("web3")
+pytest.importorskip("eth_account")
+
+from eth_account import Account
+
+from hivemind_exp.chain_utils import NonceManager, send_chain_txn
+
+
+class StubEth:
+    """Chain stand-in: tracks the pending nonce, optionally failing sends."""
+
+    def __init__(self, pending=0, failures=()):
+        self.pending = pending
+        self.failures = list(failures)
+        self.count_calls = 0
+        self.sent_nonces = []
+        self.account = self  # stands in for web3.eth.account
+        self._last_nonce = None
+
+    def get_transaction_count(self, address, block="latest"):
+        self.count_calls += 1
+        return self.pending
+
+    def sign_transaction(self, txn, private_key):
+        self._last_nonce = txn["nonce"]
+        return Account.sign_transaction(txn, private_key)
+
+    def send_raw_transaction(self, raw):
+        if self.failures:
+            raise self.failures.pop(0)
+        nonce = self._last_nonce
+        self.sent_nonces.append(nonce)
+        self.pending = max(self.pending, nonce + 1)
+        return b"\x00" * 32
+
+
+class StubWeb3:
+    def __init__(self, eth):
+        self.eth = eth
+
+    @staticmethod
+    def to_hex(value):
+        return "0x" + value.hex()
+
+
+@pytest.fixture
+def account():
+    return Account.create()
+
+
+def make_stub(**kwargs):
+    return StubWeb3(StubEth(**kwargs))
+
+
+def transfer(account):
+    return lambda: {
+        "to": account.address,
+        "value": 0,
+        "gas": 21000,
+        "gasPrice": 1,
+    }
+
+
+def test_nonces_increment_locally(account):
+    web3 = make_stub(pending=5)
+    manager = NonceManager(web3, account.address)
+    assert [manager.next_nonce() for _ in range(3)] == [5, 6, 7]
+    assert web3.eth.count_calls == 1
+
+
+def test_stale_nonce_resyncs_after_dropped_transaction(account):
+    web3 = make_stub(pending=3)
+    manager = NonceManager(web3, account.address, refresh_interval=0.0)
+    assert manager.next_nonce() == 3
+    # Nonce 3 was handed out but the transaction never reached the chain.
+    assert manager.next_nonce() == 3
+
+
+def test_send_failure_resyncs(account):
+    web3 = make_stub(pending=0, failures=[RuntimeError("timeout")])
+    manager = NonceManager(web3, account.address)
+    with pytest.raises(RuntimeError):
+        send_chain_txn(web3, account, transfer(account), 1, manager)
+    send_chain_txn(web3, account, transfer(account), 1, manager)
+    assert web3.eth.sent_nonces == [0]
+
+
+def test_nonce_too_low_retries_once(account):
+    web3 = make_stub(
+        pending=0, failures=[ValueError({"message": "nonce too low"})]
+    )
+    manager = NonceManager(web3, account.address)
+    manager.next_nonce()  # a nonce the chain already consumed elsewhere
+    web3.eth.pending = 4
+    send_chain_txn(web3, account, transfer(account), 1, manager)
+    assert web3.eth.sent_nonces == [4]
+
+
+def test_pipelined_sends_on_eth_tester(account):
+    pytest.importorskip("eth_tester")
+    from web3 import EthereumTesterProvider, Web3
+
+    web3 = Web3(EthereumTesterProvider())
+    funder = web3.eth.accounts[0]
+    web3.eth.send_transaction(
+        {"from": funder, "to": account.address, "value": 10**18}
+    )
+    manager = NonceManager(web3, account.address)
+    gas_price = web3.eth.gas_price
+
+    def factory():
+        return {
+            "to": funder,
+            "value": 1,
+            "gas": 21000,
+            "gasPrice": gas_price,
+        }
+
+    chain_id = web3.eth.chain_id
+    hashes = [
+        send_chain_txn(web3, account, factory, chain_id, manager) for _ in range(3)
+    ]
+    nonces = [web3.eth.get_transaction(h)["nonce"] for h in hashes]
+    assert nonces == [0, 1, 2]
+
+    # A nonce handed out but never sent leaves a gap until the refresh.
+    manager.next_nonce()
+    manager.refresh_interval = 0.0
+    tx_hash = send_chain_txn(web3, account, factory, chain_id, manager)
+    assert web3.eth.get_transaction(tx_hash)["nonce"] == 3
@@ -0,0 +1,182 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("hivemind")
+
+from hivemind.utils import ValueWithExpiration
+
+from hivemind_exp import dht_utils
+from hivemind_exp.dht_utils import (
+    OutputsCache,
+    decode_outputs,
+    encode_outputs,
+    get_outputs,
+    get_outputs_many,
+    get_rewards,
+    is_compact,
+    outputs_key,
+    publish_outputs,
+    publish_rewards,
+    rewards_key,
+)
+from hivemind_exp.hivemind_utils import HivemindNode
+
+def question_hash_id(question):
+    return hashlib.md5(question.encode()).hexdigest()
+
+
+needs_msgpack = pytest.mark.skipif(
+    dht_utils.msgpack is None, reason="compact outputs need msgpack"
+)
+
+
+def _resolve(future, value):
+    if future.set_running_or_notify_cancel():  # False once the reader cancelled it
+        future.set_result(value)
+
+
+class FakeDHT:
+    """Answers gets after ``latency`` seconds (or ``slow[key]``) on a timer thread."""
+
+    def __init__(self, values, latency=0.0, slow=None):
+        self.values = values
+        self.latency = latency
+        self.slow = slow or {}
+        self.gets = []
+
+    def get(self, key, latest=False, return_future=False):
+        self.gets.append(key)
+        future = Future()
+        value = self.values.get(key)
+        wrapped = None if value is None else ValueWithExpiration(value, time.time() + 60)
+        latency = self.slow.get(key, self.latency)
+        if latency:
+            threading.Timer(latency, _resolve, (future, wrapped)).start()
+        else:
+            _resolve(future, wrapped)
+        return future if return_future else future.result()
+
+    def store(self, key, value, expiration_time, subkey=None):
+        subkeys = self.values.setdefault(key, {})
+        subkeys[subkey] = ValueWithExpiration(value, expiration_time)
+        return True
+
+
+def published(node_keys, r=0, s=0):
+    return {
+        outputs_key(node_key, r, s): {
+            "question": ValueWithExpiration((1.0, {"node": node_key}), 0)
+        }
+        for node_key in node_keys
+    }
+
+
+def test_lookups_run_concurrently():
+    peers = [f"peer{i}" for i in range(8)]
+    dht = FakeDHT(published(peers), latency=0.2)
+    start = time.monotonic()
+    results = get_outputs_many(dht, [(p, 0, 0) for p in peers], cache=OutputsCache())
+    assert time.monotonic() - start < 0.2 * 4
+    assert set(results) == {(p, 0, 0) for p in peers}
+    assert results[("peer3", 0, 0)] == {
+        question_hash_id("question"): (1.0, {"node": "peer3"})
+    }
+
+
+def test_deadline_returns_partial_results():
+    dht = FakeDHT(
+        published(["fast", "slow"]), slow={outputs_key("slow", 0, 0): 1.0}
+    )
+    results = get_outputs_many(
+        dht, [("fast", 0, 0), ("slow", 0, 0)], deadline=0.1, cache=OutputsCache()
+    )
+    assert list(results) == [("fast", 0, 0)]
+
+
+def test_get_outputs_uses_cache_and_raises_when_missing():
+    cache = OutputsCache()
+    dht = FakeDHT(published(["peer"]))
+    assert get_outputs(dht, "peer", 0, 0, cache=cache)
+    assert get_outputs(dht, "peer", 0, 0, cache=cache)
+    assert len(dht.gets) == 1
+    with pytest.raises(ValueError):
+        get_outputs(dht, "absent", 0, 0, cache=cache)
+
+
+OUTPUTS = {
+    "What is 2 + 2?": (1.5, {"answer": "4", "outputs": ["<answer>4</answer>"]}),
+    question_hash_id("hashed already"): (2.0, {"answer": "x", "tags": ("a", 1)}),
+}
+
+
+@needs_msgpack
+@pytest.mark.parametrize("compress", [False, True])
+def test_compact_round_trip(compress):
+    blob = encode_outputs(OUTPUTS, compress=compress)
+    assert is_compact(blob)
+    assert decode_outputs(blob) == {
+        question_hash_id("What is 2 + 2?"): OUTPUTS["What is 2 + 2?"],
+        question_hash_id("hashed already"): OUTPUTS[question_hash_id("hashed already")],
+    }
+
+
+@pytest.mark.parametrize(
+    "compact", [pytest.param(True, marks=needs_msgpack), False]
+)
+def test_published_outputs_read_back(compact):
+    node = HivemindNode("model", "peer")
+    node.round_num, node.stage_num = 3, 1
+    dht = FakeDHT({})
+    assert publish_outputs(dht, node, OUTPUTS, compact=compact)
+
+    stored = dht.values[outputs_key("peer", 3, 1)]
+    assert len(stored) == (1 if compact else len(OUTPUTS))
+    outputs = get_outputs(dht, "peer", 3, 1, cache=OutputsCache())
+    assert outputs[question_hash_id("What is 2 + 2?")] == OUTPUTS["What is 2 + 2?"]
+
+
+@needs_msgpack
+def test_compact_and_plain_subkeys_merge():
+    node = HivemindNode("model", "peer")
+    dht = FakeDHT({})
+    publish_outputs(dht, node, {"q1": (1.0, {})}, compact=True)
+    publish_outputs(dht, node, {"q2": (2.0, {})}, compact=False)
+    outputs = get_outputs(dht, "peer", 0, 0, cache=OutputsCache())
+    assert set(outputs) == {question_hash_id("q1"), question_hash_id("q2")}
+
+
+def test_outputs_are_published_plain_by_default():
+    node = HivemindNode("model", "peer")
+    dht = FakeDHT({})
+    publish_outputs(dht, node, OUTPUTS)
+    stored = dht.values[outputs_key("peer", 0, 0)]
+    assert not any(is_compact(v.value) for v in stored.values())
+
+
+@pytest.mark.parametrize(
+    "compact", [pytest.param(True, marks=needs_msgpack), False]
+)
+def test_published_rewards_read_back_per_node(compact):
+    dht = FakeDHT({})
+    for peer, reward in (("a", 1.0), ("b", 0.5)):
+        node = HivemindNode("model", peer)
+        node.round_num, node.stage_num = 2, 0
+        assert publish_rewards(dht, node, {"q": [reward]}, compact=compact)
+    publish_rewards(dht, HivemindNode("model", "old"), 3.0)
+
+    stored = dht.values[rewards_key(2, 0)]
+    assert all(is_compact(v.value) == compact for v in stored.values())
+    rewards = get_rewards(dht, 2, 0)
+    if compact:
+        assert rewards == {
+            "a": {question_hash_id("q"): [1.0]},
+            "b": {question_hash_id("q"): [0.5]},
+        }
+    else:
+        assert rewards == {"a": {"q": [1.0]}, "b": {"q": [0.5]}}
+    assert get_rewards(dht, 0, 0) == {"old": 3.0}
@@ -0,0 +1,85 @@
+import random
+import re
+
+import pytest
+
+pytest.importorskip("genrl")
+pytest.importorskip("reasoning_gym")
+
+from rgym_exp.src.utils.reward_utils import format_reward, is_well_formatted
+
+# The pattern format_reward used before the scanner replaced it.
+REFERENCE = re.compile(
+    r"^<think>([^<]*(?:<(?!/?think>)[^<]*)*)<\/think>\n<answer>([\s\S]*?)<\/answer>$",
+    flags=re.DOTALL,
+)
+
+FRAGMENTS = [
+    "<think>",
+    "</think>",
+    "<answer>",
+    "</answer>",
+    "\n",
+    "<",
+    ">",
+    "/",
+    "think",
+    "answer",
+    "x",
+    " ",
+    "<thin",
+    "</answe",
+]
+
+
+def reference(completion):
+    return REFERENCE.match(completion) is not None
+
+
+def well_formed(rng):
+    """A completion that is likely close to the accepted shape."""
+    think = "".join(rng.choice(FRAGMENTS[4:]) for _ in range(rng.randrange(6)))
+    answer = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randrange(6)))
+    completion = f"<think>{think}</think>\n<answer>{answer}</answer>"
+    return completion + rng.choice(["", "\n", "\n\n", " "])
+
+
+@pytest.mark.parametrize(
+    "completion",
+    [
+        "<think>reasoning</think>\n<answer>42</answer>",
+        "<think></think>\n<answer></answer>\n",
+        "<think></think>\n<answer></answer>\n\n",
+        "<think>a < b</think>\n<answer>b</answer>",
+        "<think>a<think>b</think>\n<answer>c</answer>",
+        "<think>a</think>b</think>\n<answer>c</answer>",
+        "<think>a</think>\n<answer>c</answer></answer>",
+        "<think>a</think>\n<answer>c",
+        " <think>a</think>\n<answer>c</answer>",
+        "<think>a</think><answer>c</answer>",
+        "",
+    ],
+)
+def test_matches_reference_on_edge_cases(completion):
+    assert is_well_formatted(completion) == reference(completion)
+
+
+def test_matches_reference_on_random_tag_soup():
+    rng = random.Random(0)
+    for _ in range(20000):
+        if rng.random() < 0.5:
+            completion = well_formed(rng)
+        else:
+            completion = "".join(
+                rng.choice(FRAGMENTS) for _ in range(rng.randrange(12))
+            )
+        assert is_well_formatted(completion) == reference(completion), repr(completion)
+
+
+def test_format_reward_weights():
+    completions = ["<think>a</think>\n<answer>b</answer>", "b"]
+    assert format_reward(completions, weight=0.5) == [0.5, 0.0]
+
+
+def test_unclosed_brackets_are_rejected():
+    assert not is_well_formatted("<think>" + "<" * 200_000)
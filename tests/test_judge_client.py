@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("genrl")
+
+from rgym_exp.src.utils.judge_client import JudgeClient
+from tests.fake_judge import FakeJudge
+
+
+@pytest.fixture
+def judge():
+    with FakeJudge() as judge:
+        yield judge
+
+
+def make_client(judge, **kwargs):
+    client = JudgeClient(judge.url, timeout=(1.0, 5.0), backoff_factor=0.0, **kwargs)
+    return client
+
+
+def test_questions_for_round_uses_matching_prefetch(judge):
+    client = make_client(judge)
+    client.prefetch_questions("peer", 3, "model", 2).result(timeout=5)
+    questions = client.questions_for_round(3)
+    assert [q["question"] for q in questions] == [
+        "question 0 for round 3",
+        "question 1 for round 3",
+    ]
+    assert judge.paths().count("/request-question/") == 2
+    client.close()
+
+
+def test_questions_for_round_skips_unready_prefetch(judge):
+    judge.latency = 0.5
+    client = make_client(judge)
+    client.prefetch_questions("peer", 3, "model", 1)
+    start = time.monotonic()
+    assert client.questions_for_round(3) == []
+    assert time.monotonic() - start < 0.25
+    client.close()
+
+
+def test_questions_for_round_skips_other_rounds(judge):
+    client = make_client(judge)
+    client.prefetch_questions("peer", 3, "model", 1).result(timeout=5)
+    assert client.questions_for_round(5) == []
+    assert client.questions_for_round(3) == []  # The stale batch was dropped.
+    assert judge.paths() == ["/request-question/"]
+    client.close()
+
+
+def test_refused_requests_are_retried(judge):
+    client = make_client(judge, max_retries=3)
+    judge.fail_next = 1
+    client.submit_answers(
+        0, [{"session_id": "s0", "question": "q"}], ["<answer>1</answer>"]
+    )
+    assert judge.paths() == ["/submit-answer/", "/submit-answer/"]
+    client.close()
+
+
+def test_submission_is_not_retried_on_gateway_error(judge):
+    client = make_client(judge, max_retries=3)
+    judge.fail_next, judge.fail_status = 1, 502
+    client.submit_answers(
+        0, [{"session_id": "s0", "question": "q"}], ["<answer>1</answer>"]
+    )
+    assert judge.paths() == ["/submit-answer/"]
+    client.close()
+
+
+def test_submit_answers_async_does_not_block(judge):
+    judge.latency = 0.5
+    client = make_client(judge)
+    start = time.monotonic()
+    future = client.submit_answers_async(
+        0, [{"session_id": "s0", "question": "q"}], ["a"]
+    )
+    assert time.monotonic() - start < 0.25
+    future.result(timeout=5)
+    assert judge.paths() == ["/submit-answer/"]
+    client.close()
@@ -0,0 +1,101 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from rgym_exp.src.utils.kv_prefix import (
+    SharedPrefixBatch,
+    longest_common_prefix,
+    prefill,
+    unpad,
+)
+
+PAD = 0
+PROMPTS = [
+    [5, 6, 7, 8, 9, 10, 11],
+    [5, 6, 7, 8, 12],
+    [5, 6, 7, 8, 13, 14, 15, 16, 17],
+]
+
+
+def tiny_model(seed=0):
+    torch.manual_seed(seed)
+    config = transformers.LlamaConfig(
+        vocab_size=64,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=128,
+        pad_token_id=PAD,
+        eos_token_id=1,
+    )
+    return transformers.LlamaForCausalLM(config).eval()
+
+
+def left_padded(sequences):
+    width = max(len(seq) for seq in sequences)
+    input_ids = torch.full((len(sequences), width), PAD, dtype=torch.long)
+    attention_mask = torch.zeros_like(input_ids)
+    for row, seq in enumerate(sequences):
+        input_ids[row, width - len(seq) :] = torch.tensor(seq)
+        attention_mask[row, width - len(seq) :] = 1
+    return input_ids, attention_mask
+
+
+def test_longest_common_prefix():
+    assert longest_common_prefix(PROMPTS) == 4
+    assert longest_common_prefix([[1, 2], [1, 2]]) == 2
+    assert longest_common_prefix([[1], [2]]) == 0
+
+
+def test_layout_keeps_prefix_columns_and_positions():
+    batch = SharedPrefixBatch.from_sequences(PROMPTS, PAD)
+    assert batch.prefix_length == 4
+    assert batch.input_ids.size(1) == 9
+    assert unpad(batch.input_ids, batch.attention_mask) == PROMPTS
+    assert batch.input_ids[:, :4].tolist() == [PROMPTS[0][:4]] * 3
+    # Row 1 has its suffix right-aligned after a masked gap.
+    assert batch.position_ids[1][batch.attention_mask[1].bool()].tolist() == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+
+
+def test_identical_prompts_keep_last_token_out_of_prefill():
+    batch = SharedPrefixBatch.from_sequences([[3, 4, 5], [3, 4, 5]], PAD)
+    assert batch.prefix_length == 2
+
+
+@pytest.mark.parametrize("repeats", [1, 2])
+def test_greedy_outputs_match_baseline(repeats):
+    model = tiny_model()
+    max_new_tokens = 8
+    kwargs = dict(
+        do_sample=False,
+        max_new_tokens=max_new_tokens,
+        pad_token_id=PAD,
+        eos_token_id=None,
+    )
+
+    input_ids, attention_mask = left_padded(PROMPTS)
+    baseline = model.generate(
+        input_ids.repeat_interleave(repeats, dim=0),
+        attention_mask=attention_mask.repeat_interleave(repeats, dim=0),
+        **kwargs,
+    )[:, -max_new_tokens:]
+
+    batch = SharedPrefixBatch.from_sequences(PROMPTS, PAD)
+    cache = prefill(model, batch, repeats)
+    shared = model.generate(
+        batch.input_ids.repeat_interleave(repeats, dim=0),
+        attention_mask=batch.attention_mask.repeat_interleave(repeats, dim=0),
+        past_key_values=cache,
+        **kwargs,
+    )[:, -max_new_tokens:]
+
+    assert torch.equal(shared, baseline)
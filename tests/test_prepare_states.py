@@ -0,0 +1,61 @@
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("genrl.data")
+pytest.importorskip("reasoning_gym.composite")
+
+from rgym_exp.src.data import ReasoningGymDataManager
+
+
+def batch_id(question):
+    # genrl keys batch items by the md5 of the question, as an int.
+    return int(hashlib.md5(question.encode()).hexdigest(), 16)
+
+
+class Payload(dict):
+    """Transplant payload: read by attribute in transplant_trees, by key after."""
+
+    def __init__(self, question):
+        super().__init__(
+            world_state=SimpleNamespace(environment_states={"question": question}),
+            actions=["a", "b"],
+            metadata={},
+        )
+        self.actions = self["actions"]
+
+
+class StubTree(dict):
+    def __init__(self, world_state):
+        super().__init__({0: {0: {}}})
+        self.world_state = world_state
+
+    def append_node_actions(self, stage, node_idx, actions):
+        self[stage][node_idx]["actions"] = actions
+
+
+class StubState:
+    stage = 0
+    game_tree_factory = StubTree
+
+    def __init__(self):
+        self.trees = {"me": {}}
+
+    def get_latest_state(self):
+        return self.trees
+
+
+def test_transplants_with_a_mismatched_batch_id_are_skipped():
+    manager = ReasoningGymDataManager.__new__(ReasoningGymDataManager)
+    manager.num_generations = 2
+    manager.num_transplant_trees = 2
+    manager.transplant_scan_budget = None
+    manager.prefer_novel_transplants = True
+    swarm_states = {
+        "honest": {batch_id("q1"): [Payload("q1")]},
+        "liar": {batch_id("something else"): [Payload("q2")]},
+    }
+    trees = manager.prepare_states(StubState(), swarm_states)
+    assert set(trees) == {"me", "honest"}
+    assert trees["honest"][batch_id("q1")][0][0]["actions"] == ["a", "b"]
@@ -0,0 +1,75 @@
+import multiprocessing
+import time
+
+import pytest
+
+pytest.importorskip("genrl")
+pytest.importorskip("reasoning_gym")
+
+from rgym_exp.src.utils.reward_engine import RewardScoringEngine, _content_key
+
+SCORED = []
+
+
+def score(prediction, answer, metadata):
+    # Module-level so spawned pool workers can unpickle it.
+    SCORED.append(prediction)
+    if "hang" in prediction:
+        time.sleep(60)
+    return 1.0 if str(answer) in prediction else 0.0
+
+
+def correctness(
+    completions, answer, metadata, include_formatting=False, correctness=None
+):
+    return correctness if correctness is not None else [0.0] * len(completions)
+
+
+def answer_tag(text):
+    return f"<think>...</think>\n<answer>{text}</answer>"
+
+
+def test_content_key_equates_equal_contents():
+    assert _content_key({"b": [1, 2], "a": 1}) == _content_key({"a": 1, "b": [1, 2]})
+    assert _content_key({"a": 1}) != _content_key({"a": 2})
+    assert _content_key("x") == "x"
+    assert _content_key({"a": object()}) is not None
+
+
+def test_identical_items_are_scored_once():
+    SCORED.clear()
+    engine = RewardScoringEngine(correctness, score_fn=score)
+    completions = [answer_tag("4"), answer_tag("5"), answer_tag("4")]
+    rewards = engine.score_nodes(
+        [completions, list(completions)],
+        ["4", "4"],
+        # Equal metadata in distinct dict objects shares one scoring key.
+        [{"source_dataset": None, "extra": [1]} for _ in range(2)],
+    )
+    assert rewards == [[1.0, 0.0, 1.0], [1.0, 0.0, 1.0]]
+    assert len(SCORED) == 2
+
+
+def test_hung_worker_is_terminated_and_rest_rescored():
+    engine = RewardScoringEngine(
+        correctness,
+        num_workers=2,
+        item_timeout=1.0,
+        timeout_reward=-1.0,
+        score_fn=score,
+    )
+    try:
+        completions = [answer_tag(text) for text in ("hang", "4", "5", "44")]
+        start = time.monotonic()
+        rewards = engine.score_nodes([completions], ["4"], [None])
+        assert time.monotonic() - start < 30
+        assert rewards == [[-1.0, 1.0, 0.0, 1.0]]
+
+        # The reset pool keeps scoring later rounds.
+        completions = [answer_tag("4"), answer_tag("3")]
+        rewards = engine.score_nodes([completions], ["4"], [None])
+        assert rewards == [[1.0, 0.0]]
+    finally:
+        engine.close()
+    assert engine._pool is None
+    assert not multiprocessing.active_children()
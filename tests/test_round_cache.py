@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+
+from hivemind_exp.hivemind_utils import HivemindNode, RoundCache
+
+
+def fill(cache, rounds, questions=4):
+    for r in range(rounds):
+        for q in range(questions):
+            cache.put(r, 0, f"q{q}", (float(r), {"answer": "x" * 64}))
+
+
+def test_old_rounds_spill_to_a_temporary_file():
+    cache = RoundCache(max_rounds=2)
+    fill(cache, 5)
+    assert cache.stats == {"stages": 2, "bytes": cache.nbytes, "spilled_stages": 3}
+    assert cache[(0, 0)]["q0"] == (0.0, {"answer": "x" * 64})
+    assert len(cache) == 5
+
+    path = cache.spill_path
+    assert os.path.exists(path)
+    del cache
+    assert not os.path.exists(path)
+
+
+def test_byte_budget_spills_to_explicit_path(tmp_path):
+    path = str(tmp_path / "rounds.sqlite")
+    cache = RoundCache(max_rounds=100, max_bytes=1, spill_path=path)
+    fill(cache, 3)
+    assert cache.stats["stages"] == 1
+    assert (1, 0) in cache and (2, 0) in cache
+
+    # A fresh cache on the same path can still read the spilled rounds.
+    assert RoundCache(spill_path=path)[(0, 0)]["q3"][0] == 0.0
+
+
+def test_node_reads_spilled_stage_outputs():
+    node = HivemindNode("model", "peer", round_cache_rounds=1)
+    node.put_stage_outputs(0, 0, "q", (1.0, {"a": 1}))
+    node.put_stage_outputs(1, 0, "q", (2.0, {"a": 2}))
+    assert node.get_stage_outputs(0, 0) == {"q": (1.0, {"a": 1})}
+    assert node.get_stage_outputs(5, 0) is None
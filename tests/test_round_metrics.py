@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from rgym_exp.src.utils.round_metrics import RoundMetrics, count_generated
+
+
+def test_flush_reports_tracked_stats(tmp_path):
+    metrics = RoundMetrics(
+        str(tmp_path / "metrics.jsonl"), str(tmp_path / "metrics.prom")
+    )
+    stats = {"stages": 2, "bytes": 100}
+    metrics.track("round_cache", lambda: stats)
+    metrics.add("train_s", 1.5)
+
+    values = metrics.flush(3)
+    assert values["round_cache_stages"] == 2
+    assert values["round_cache_bytes"] == 100
+    assert values["train_s"] == 1.5
+
+    record = json.loads((tmp_path / "metrics.jsonl").read_text())
+    assert record["round"] == 3 and record["round_cache_bytes"] == 100
+    assert "rl_swarm_round_cache_stages 2" in (tmp_path / "metrics.prom").read_text()
+
+    # Tracked stats are sampled again at every flush.
+    stats["stages"] = 5
+    assert metrics.flush(4)["round_cache_stages"] == 5
+
+
+def test_generated_tokens_stop_at_first_eos():
+    torch = pytest.importorskip("torch")
+    eos, pad = 2, 0
+    prompt = torch.tensor([[5, 6], [5, 6], [5, 6]])
+    sequences = torch.tensor(
+        [
+            [5, 6, 7, 8, eos, eos, eos],  # finished early, padded with EOS
+            [5, 6, 7, 8, 9, 10, 11],  # hit the length limit
+            [5, 6, eos, pad, pad, pad, pad],
+        ]
+    )
+    counts = count_generated(eos, pad)((prompt,), {}, sequences)
+    assert counts == {"generated_tokens": 3 + 5 + 1, "generated_samples": 3}
+
+    counts = count_generated([eos, 99])((), {"input_ids": prompt}, sequences)
+    assert counts["generated_tokens"] == 9
+
+    counts = count_generated(pad_token_id=pad)((prompt,), {}, sequences)
+    assert counts["generated_tokens"] == 5 + 5 + 1
@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("genrl")
+pytest.importorskip("hivemind")
+
+from rgym_exp.src.utils.round_watcher import RoundStageWatcher
+
+
+class StubCoordinator:
+    def __init__(self, round_stage=(0, 0)):
+        self.round_stage = round_stage
+        self.polls = 0
+        self.lock = threading.Lock()
+
+    def get_round_and_stage(self):
+        with self.lock:
+            self.polls += 1
+            return self.round_stage
+
+
+def test_no_chain_polls_while_idle():
+    coordinator = StubCoordinator()
+    watcher = RoundStageWatcher(coordinator, check_interval=0.01)
+    watcher.start(initial=(0, 0))
+    try:
+        time.sleep(0.1)
+        assert coordinator.polls == 0
+    finally:
+        watcher.stop()
+
+
+def test_wait_for_polls_until_round_advances():
+    coordinator = StubCoordinator()
+    watcher = RoundStageWatcher(
+        coordinator, check_interval=0.01, max_check_interval=0.02
+    )
+    watcher.start(initial=(0, 0))
+    try:
+        threading.Timer(0.05, setattr, (coordinator, "round_stage", (1, 0))).start()
+        assert watcher.wait_for(lambda r, _: r >= 1, timeout=5.0) == (1, 0)
+        polls = coordinator.polls
+        time.sleep(0.1)
+        assert coordinator.polls == polls
+    finally:
+        watcher.stop()
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from itertools import islice
+from typing import Optional
+
+import pytest
+
+pytest.importorskip("genrl")
+pytest.importorskip("pyarrow")
+
+from rgym_exp.src.utils.sample_cache import CachedSampleStream, SampleCache
+
+CHUNK_SIZE = 10
+
+
+@dataclass
+class Config:
+    seed: Optional[int] = 0
+    size: int = CHUNK_SIZE
+
+
+class CountingDataset:
+    """Row ``i`` of the dataset seeded ``s`` is question ``q<s>-<i>``."""
+
+    def __init__(self, config: Config):
+        self.config = config
+
+    def __getitem__(self, i):
+        return {
+            "question": f"q{self.config.seed}-{i}",
+            "answer": i,
+            "metadata": {"seed": self.config.seed},
+        }
+
+
+def expected(n):
+    return [f"q{i // CHUNK_SIZE}-{i % CHUNK_SIZE}" for i in range(n)]
+
+
+def take(cache_dir, n, flush_every=3):
+    stream = CachedSampleStream(
+        CountingDataset(Config()),
+        SampleCache(str(cache_dir), "key"),
+        CHUNK_SIZE,
+        flush_every=flush_every,
+    )
+    return [item["question"] for item in islice(stream, n)]
+
+
+def test_fresh_stream_matches_reseeded_chunks(tmp_path):
+    assert take(tmp_path, 25) == expected(25)
+    assert take(tmp_path, 25) == expected(25)
+
+
+def test_restart_after_partial_flush_replays_in_order(tmp_path):
+    # Run 1 generates 4 samples but only the first 3 were flushed.
+    assert take(tmp_path, 4) == expected(4)
+    cache = SampleCache(str(tmp_path), "key")
+    assert cache.read_chunk(0).column("question").to_pylist() == expected(3)
+
+    # Run 2 replays the partial chunk, then generates the rest of it.
+    assert take(tmp_path, 12) == expected(12)
+    assert cache.read_chunk(0).column("question").to_pylist() == expected(10)
+
+    # Run 3 replays both runs' samples unchanged.
+    assert take(tmp_path, 12) == expected(12)
+    assert take(tmp_path, 30) == expected(30)
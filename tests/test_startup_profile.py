@@ -0,0 +1,80 @@
+import json
+import threading
+
+import pytest
+
+from rgym_exp.src.utils.startup_profile import (
+    StartupTimeline,
+    install_import_timer,
+    set_active_timeline,
+    startup_phase,
+)
+
+
+def test_nested_phases_record_self_time(tmp_path):
+    timeline = StartupTimeline()
+    with timeline.phase("outer"):
+        with timeline.phase("inner"):
+            pass
+
+    inner, outer = timeline.phases
+    assert (inner["name"], inner["depth"]) == ("inner", 1)
+    assert inner["stack"] == "MainThread;outer;inner"
+    assert outer["self_s"] <= outer["duration_s"]
+    assert timeline.summary().startswith("outer=")
+
+    timeline.write_report(str(tmp_path))
+    report = json.loads((tmp_path / "startup_profile.json").read_text())
+    assert sorted(p["name"] for p in report["phases"]) == ["inner", "outer"]
+    folded = (tmp_path / "startup_profile.folded").read_text().splitlines()
+    assert {line.rsplit(" ", 1)[0] for line in folded} == {
+        "MainThread;outer",
+        "MainThread;outer;inner",
+    }
+
+
+def test_phases_from_threads_keep_their_own_stacks():
+    timeline = StartupTimeline()
+
+    def work():
+        with timeline.phase("work"):
+            pass
+
+    with timeline.phase("main"):
+        thread = threading.Thread(target=work, name="worker")
+        thread.start()
+        thread.join()
+    work_phase = next(p for p in timeline.phases if p["name"] == "work")
+    assert work_phase["stack"] == "worker;work" and work_phase["depth"] == 0
+
+
+def test_startup_phase_is_a_no_op_without_a_timeline(tmp_path):
+    with startup_phase("unused"):
+        pass
+
+    timeline = StartupTimeline()
+    set_active_timeline(timeline)
+    try:
+        with startup_phase("hf.whoami"):
+            pass
+    finally:
+        set_active_timeline(None)
+    assert [p["name"] for p in timeline.phases] == ["hf.whoami"]
+
+    timeline.write_readiness(str(tmp_path / "ready.json"), peer_id="peer")
+    ready = json.loads((tmp_path / "ready.json").read_text())
+    assert ready["peer_id"] == "peer" and ready["phases"][0]["name"] == "hf.whoami"
+
+
+def test_import_timer_records_first_imports_only():
+    timeline = StartupTimeline()
+    uninstall = install_import_timer(timeline)
+    try:
+        __import__("json")  # already imported: not recorded
+        with pytest.raises(ImportError):
+            __import__("this_module_does_not_exist")
+    finally:
+        uninstall()
+    assert [p["name"] for p in timeline.phases] == [
+        "import:this_module_does_not_exist"
+    ]
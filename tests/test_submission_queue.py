@@ -0,0 +1,94 @@
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("genrl")
+
+from rgym_exp.src.utils.submission_queue import ChainSubmissionQueue
+
+
+class StubCoordinator:
+    """Records submissions; rounds in ``failing`` raise on every attempt."""
+
+    def __init__(self, failing=(), error=RuntimeError("rpc unavailable")):
+        self.failing = set(failing)
+        self.error = error
+        self.attempts = []
+        self.rewards = []
+        self.winners = []
+        self.lock = threading.Lock()
+
+    def submit_reward(self, round_num, stage, reward, peer_id):
+        with self.lock:
+            self.attempts.append(round_num)
+            if round_num in self.failing:
+                raise self.error
+            self.rewards.append((round_num, reward))
+
+    def submit_winners(self, round_num, winners, peer_id):
+        with self.lock:
+            self.winners.append((round_num, winners))
+
+
+def make_queue(tmp_path, coordinator, **kwargs):
+    kwargs.setdefault("initial_backoff", 0.01)
+    kwargs.setdefault("max_backoff", 0.05)
+    return ChainSubmissionQueue(
+        coordinator, "peer", str(tmp_path / "journal.json"), **kwargs
+    )
+
+
+def test_coalesces_and_submits_rounds(tmp_path):
+    coordinator = StubCoordinator()
+    queue = make_queue(tmp_path, coordinator)
+    queue.submit(1, 2, ["a"])
+    queue.submit(2, 3, ["b"])
+    assert queue.flush(timeout=5)
+    assert sorted(coordinator.rewards) == [(1, 2), (2, 3)]
+    assert queue.pending() == 0
+    queue.close()
+
+
+def test_failing_round_does_not_block_newer_rounds(tmp_path):
+    coordinator = StubCoordinator(failing={1})
+    queue = make_queue(tmp_path, coordinator, max_attempts=3)
+    for round_num in (1, 2, 3):
+        queue.submit(round_num, 1, ["a"])
+    assert queue.flush(timeout=5)
+    assert sorted(r for r, _ in coordinator.rewards) == [2, 3]
+    assert coordinator.attempts.count(1) == 3
+    assert queue.pending() == 0
+    queue.close()
+
+
+def test_permanent_error_is_dropped_without_retry(tmp_path):
+    coordinator = StubCoordinator(
+        failing={1}, error=ValueError("execution reverted: round already closed")
+    )
+    queue = make_queue(tmp_path, coordinator)
+    queue.submit(1, 1, ["a"])
+    assert queue.flush(timeout=5)
+    assert coordinator.attempts == [1]
+    queue.close()
+
+
+def test_pending_rounds_survive_restart(tmp_path):
+    coordinator = StubCoordinator(failing={7})
+    queue = make_queue(
+        tmp_path, coordinator, initial_backoff=60.0, max_backoff=60.0
+    )
+    queue.submit(7, 4, ["a"])
+    assert not queue.flush(timeout=0.2)
+    queue.close()
+
+    with open(tmp_path / "journal.json") as f:
+        journal = json.load(f)
+    assert journal["rewards"] == {"7": 4}
+    assert journal["attempts"] == {"7": 1}
+
+    coordinator = StubCoordinator()
+    queue = make_queue(tmp_path, coordinator)
+    assert queue.flush(timeout=5)
+    assert coordinator.rewards == [(7, 4)]
+    queue.close()
@@ -0,0 +1,149 @@
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("genrl.trainer.grpo_trainer")
+
+from rgym_exp.src.trainer import GRPOTrainerModule
+from rgym_exp.src.utils.replay_buffer import ReplayBuffer, ReplayEntry
+
+
+class TinyModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.weight = torch.nn.Parameter(torch.ones(1))
+
+    @property
+    def device(self):
+        return self.weight.device
+
+
+class RecordingAutocast:
+    def __init__(self):
+        self.active = False
+
+    def __enter__(self):
+        self.active = True
+
+    def __exit__(self, *exc):
+        self.active = False
+
+
+class StubState:
+    round = 0
+    peer_id = "me"
+
+    def __init__(self, rewards):
+        self.mapping = {i: ("me", i, 0) for i in range(len(rewards))}
+        self.rewards = {0: {"me": {i: [r] for i, r in enumerate(rewards)}}}
+
+    def get_stage_state(self, stage):
+        return self.mapping
+
+    def get_stage_actions(self, stage):
+        return {"me": {i: [["a", "b"]] for i in range(len(self.mapping))}}
+
+
+class StubDataManager:
+    def prepare_input(self, mapping, stage):
+        return [{"prompt": str(i)} for i in range(len(mapping))], mapping
+
+
+def make_trainer():
+    trainer = GRPOTrainerModule.__new__(GRPOTrainerModule)
+    trainer.model = TinyModel()
+    trainer.autocast = RecordingAutocast()
+    trainer.optimizer = SimpleNamespace(steps=0)
+    trainer.optimizer.step = lambda: setattr(
+        trainer.optimizer, "steps", trainer.optimizer.steps + 1
+    )
+    trainer.replay_buffer = None
+    trainer.replay_groups_per_step = 0
+    trainer._round_groups = trainer._round_skipped_groups = 0
+    trainer.logged, trainer.cleanups, trainer.losses = [], 0, []
+
+    def log(metrics, step):
+        trainer.logged.append(metrics)
+
+    def cleanup_step():
+        trainer.cleanups += 1
+
+    def process_inputs(inputs, with_template=True, for_training=False):
+        ids = torch.ones((len(inputs), 3), dtype=torch.long)
+        return SimpleNamespace(input_ids=ids, attention_mask=torch.ones_like(ids))
+
+    def compute_loss(model, inputs):
+        trainer.losses.append((trainer.autocast.active, inputs["advantages"]))
+        return (model.weight * inputs["advantages"]).sum()
+
+    trainer.log = log
+    trainer.cleanup_step = cleanup_step
+    trainer._process_inputs = process_inputs
+    trainer.compute_loss = compute_loss
+    return trainer
+
+
+def test_zero_variance_groups_are_dropped_under_autocast():
+    trainer = make_trainer()
+    state = StubState([[1.0, 1.0], [0.0, 1.0], [0.0, 0.0]])
+    assert trainer.step(0, state, StubDataManager(), state.rewards, 0) == 1
+
+    [(in_autocast, advantages)] = trainer.losses
+    assert in_autocast
+    assert advantages.tolist() == pytest.approx([-0.7071, 0.7071], abs=1e-3)
+    assert trainer.optimizer.steps == 1 and trainer.cleanups == 1
+    assert trainer.logged[-1]["train/skipped_group_frac"] == pytest.approx(2 / 3)
+
+
+def test_degenerate_stage_skips_the_optimizer_step():
+    trainer = make_trainer()
+    state = StubState([[1.0, 1.0], [0.0, 0.0]])
+    trainer.step(0, state, StubDataManager(), state.rewards, 0)
+    assert trainer.losses == [] and trainer.optimizer.steps == 0
+    assert trainer._round_skipped_groups == 2
+
+
+def with_replay(trainer, round_num):
+    trainer.num_generations = 2
+    trainer.replay_groups_per_step = 2
+    trainer.replay_buffer = ReplayBuffer(seed=0)
+    trainer.replay_buffer.add(
+        "peer",
+        ReplayEntry(
+            prompt={"prompt": "old"},
+            completions=["x", "y"],
+            rewards=[0.0, 1.0],
+            stage=0,
+            round=round_num - 1,
+        ),
+    )
+    return trainer
+
+
+def test_replayed_groups_are_scaled_by_age_weight():
+    trainer = with_replay(make_trainer(), 1)
+    state = StubState([[0.0, 1.0]])
+    state.round = 1
+    trainer.replay_buffer.add(
+        "older",
+        ReplayEntry({"prompt": "older"}, ["x", "y"], [1.0, 0.0], 0, round=-1),
+    )
+    trainer.step(0, state, StubDataManager(), state.rewards, 0)
+
+    [(_, advantages)] = trainer.losses
+    fresh, replayed = advantages[:2].tolist(), sorted(advantages[2:].tolist())
+    assert fresh == pytest.approx([-0.7071, 0.7071], abs=1e-3)
+    # One round old weighs 0.5, two rounds old 0.25.
+    assert replayed == pytest.approx(
+        [-0.3536, -0.1768, 0.1768, 0.3536], abs=1e-3
+    )
+
+
+def test_degenerate_stage_does_not_step_on_replay_alone():
+    trainer = with_replay(make_trainer(), 1)
+    state = StubState([[1.0, 1.0]])
+    state.round = 1
+    trainer.step(0, state, StubDataManager(), state.rewards, 0)
+    assert trainer.losses == [] and trainer.optimizer.steps == 0
+    assert trainer.logged[-1]["train/replayed_groups"] == 0